@@ -1,17 +1,18 @@
 import pandas as pd
 import numpy as np
-import re
 import argparse
 import sys # Import sys to redirect stdout
 import os # Import os for path manipulation
+from tableprint import print_table
+from outlier_common import REQUIRED_COLUMNS, read_input_csv, get_quartiles, classify_outliers, get_group_names
 
 class Tee(object):
     def __init__(self, *files):
         self.files = files
     def write(self, obj):
+        # Leave flushing to the streams' own buffering; a flush per write is a syscall per print
         for f in self.files:
             f.write(obj)
-            f.flush()
     def flush(self):
         for f in self.files:
             f.flush()
@@ -22,105 +23,48 @@ STOCKS_TOP = 50 # User-defined variable for top/bottom N display for Stocks
 CFD_TOP = 40    # User-defined variable for top/bottom N display for CFDs
 FUTURES_TOP = 5 # User-defined variable for top/bottom N display for Futures
 TOP_N_DISPLAY = 20 # User-defined variable for top/bottom N display (will be set dynamically)
+FILE_TYPE_TOPS = {'Stocks': STOCKS_TOP, 'CFD': CFD_TOP, 'Futures': FUTURES_TOP} # Checked in this order against the filename
 
-def get_outlier_note(row, bounds_dict, small_industries_list):
+def get_outlier_notes(df, bounds_dict, small_industries_list):
     """
-    Determines the outlier status note for a given stock row.
+    Determines the outlier status note for every stock in a DataFrame.
 
     Args:
-        row (pd.Series): A row from the DataFrame.
+        df (pd.DataFrame): The DataFrame containing the stocks.
         bounds_dict (dict): A dictionary containing the outlier bounds for each industry.
-        small_industries_list (list): A list of industries classified as small.
+        small_industries_list (frozenset): The industries classified as small.
 
     Returns:
-        str: A note indicating the stock's outlier status.
+        pd.Series: A note indicating each stock's outlier status, aligned with df.
     """
-    industry = row['IndustryName']
-    sector = row['SectorName'] # Get the sector for the current row
-    ratio = row['MCap/EV (%)']
-
-    # Determine which group the stock belongs to for bound checking
-    if industry in small_industries_list:
-        # If it's a small industry, its group name is its aggregated sector group
-        group_name = f"AGGREGATED {sector.upper()} INDUSTRIES"
-        if sector == 'Undefined':
-            group_name = "AGGREGATED MISCELLANEOUS"
-
-    else:
-        # Otherwise, it's its own industry group
-        group_name = industry
-
-    # Check if bounds were successfully calculated for this group
-    if group_name in bounds_dict:
-        bounds = bounds_dict[group_name]
-        if ratio < bounds['lower']:
-            return '(LOW - Statistically Significant)'
-        elif ratio > bounds['upper']:
-            return '(HIGH - Statistically Significant)'
-    
-    # Default note if it's not a statistical outlier within its group
-    return '(Within Normal Range)'
+    group_names = get_group_names(df, small_industries_list)
+    ratio = df['MCap/EV (%)']
+
+    # Groups without calculated bounds map to NaN, which never compares as an outlier
+    lower = group_names.map({name: bounds['lower'] for name, bounds in bounds_dict.items()})
+    upper = group_names.map({name: bounds['upper'] for name, bounds in bounds_dict.items()})
+
+    flags = classify_outliers(ratio, lower.to_numpy(), upper.to_numpy())
+    notes = np.select(
+        [flags < 0, flags > 0],
+        ['(LOW - Statistically Significant)', '(HIGH - Statistically Significant)'],
+        default='(Within Normal Range)'
+    )
+    return pd.Series(notes, index=df.index)
+
+def get_group_quartiles(grouped):
+    """
+    Calculates the MCap/EV (%) quartiles of every group in a single grouped pass.
 
-def _print_table(title, dataframe, columns_info):
-    print(f"\n\n{'='*25} {title} {'='*25}")
-    if dataframe.empty:
-        print("No outliers found in this category.")
-        return
+    Args:
+        grouped (DataFrameGroupBy): The grouped DataFrame containing the data.
 
-    # Calculate column widths
-    column_widths = {}
-    for col_df_name, col_header, col_format in columns_info:
-        max_len = len(col_header)
-        if col_df_name in dataframe.columns:
-            if col_format:
-                if col_format.endswith('%'):
-                    # Handle percentage formatting separately
-                    base_format = col_format[:-1] # Remove the %
-                    formatted_data = dataframe[col_df_name].apply(lambda x: f"{x:{base_format}}%")
-                else:
-                    formatted_data = dataframe[col_df_name].apply(lambda x: f"{x:{col_format}}")
-                max_len = max(max_len, formatted_data.str.len().max())
-            else:
-                max_len = max(max_len, dataframe[col_df_name].astype(str).str.len().max())
-        column_widths[col_df_name] = max_len
-
-    # Adjust for specific columns that might have fixed width requirements or minimums
-    column_widths['Symbol'] = max(column_widths.get('Symbol', 0), 10)
-    column_widths['IndustryName'] = max(column_widths.get('IndustryName', 0), 40)
-    column_widths['MCap/EV (%)'] = max(column_widths.get('MCap/EV (%)', 0), 15)
-    column_widths['Note'] = max(column_widths.get('Note', 0), 4) # Minimum for 'Note'
-
-    # Print header
-    header_parts = []
-    for col_df_name, col_header, _ in columns_info:
-        header_parts.append(f"{col_header:<{column_widths[col_df_name]}}")
-    header_line = " | ".join(header_parts)
-    print("-" * len(header_line))
-    print(header_line)
-    print("-" * len(header_line))
-
-    # Print data rows
-    for _, row in dataframe.iterrows():
-        row_parts = []
-        for col_df_name, _, col_format in columns_info:
-            value = row[col_df_name]
-            formatted_value_str = ""
-            if pd.isna(value):
-                formatted_value_str = "N/A" # Or an empty string, depending on preference
-            elif col_format:
-                if col_format.endswith('%'):
-                    base_format = col_format[:-1]
-                    formatted_value_str = f"{value:{base_format}}%"
-                else:
-                    formatted_value_str = f"{value:{col_format}}"
-            else:
-                formatted_value_str = str(value)
-            
-            row_parts.append(formatted_value_str.ljust(column_widths[col_df_name]))
-        print(" | ".join(row_parts))
-    print("-" * len(header_line))
+    Returns:
+        pd.DataFrame: The 0.25 and 0.75 quantiles, one row per group.
+    """
+    return grouped['MCap/EV (%)'].quantile([0.25, 0.75]).unstack()
 
-def analyze_group(group_name, group_df, bounds_dict=None, small_industries_list=None):
+def analyze_group(group_name, group_df, bounds_dict=None, small_industries_list=None, quartiles=None):
     """
     Performs a statistical VaR outlier analysis on a given group of stocks.
     This function will produce NO output unless at least one
@@ -130,14 +74,17 @@ def analyze_group(group_name, group_df, bounds_dict=None, small_industries_list=
         group_name (str): The name of the industry/group being analyzed.
         group_df (pd.DataFrame): The DataFrame containing the data.
         bounds_dict (dict, optional): A dictionary to store the calculated bounds.
+        quartiles (pd.Series, optional): Precalculated 0.25 and 0.75 quantiles for the group.
     """
     # Silently exit if the group is too small for meaningful analysis
     if len(group_df) < MINIMUM_GROUP_SIZE:
         return
 
     # --- Perform calculations silently first ---
-    Q1 = group_df['MCap/EV (%)'].quantile(0.25)
-    Q3 = group_df['MCap/EV (%)'].quantile(0.75)
+    if quartiles is not None:
+        Q1, Q3 = quartiles[0.25], quartiles[0.75]
+    else:
+        Q1, Q3 = get_quartiles(group_df['MCap/EV (%)'])
     IQR = Q3 - Q1
 
     # Only proceed if there is a statistical range to measure
@@ -149,10 +96,8 @@ def analyze_group(group_name, group_df, bounds_dict=None, small_industries_list=
         if bounds_dict is not None:
             bounds_dict[group_name] = {'lower': lower_bound, 'upper': upper_bound}
 
-        all_outliers = group_df[
-            (group_df['MCap/EV (%)'] < lower_bound) |
-            (group_df['MCap/EV (%)'] > upper_bound)
-        ].copy()
+        flags = classify_outliers(group_df['MCap/EV (%)'], lower_bound, upper_bound)
+        all_outliers = group_df[flags != 0].copy()
 
         # --- Only print a report if outliers were actually found ---
         if not all_outliers.empty:
@@ -171,11 +116,7 @@ def analyze_group(group_name, group_df, bounds_dict=None, small_industries_list=
             
             # Print details of each outlier
             if not all_outliers.empty:
-                all_outliers['Note'] = all_outliers.apply(
-                    get_outlier_note,
-                    axis=1,
-                    args=(bounds_dict, small_industries_list)
-                )
+                all_outliers['Note'] = get_outlier_notes(all_outliers, bounds_dict, small_industries_list)
                 columns_info = [
                     ('Symbol', 'Symbol', None),
                     ('IndustryName', 'Industry', None),
@@ -185,11 +126,11 @@ def analyze_group(group_name, group_df, bounds_dict=None, small_industries_list=
                     ('VaR_to_Ask_Ratio', 'VaR/Ask Ratio', None),
                     ('Note', 'Note', None)
                 ]
-                _print_table("Statistical MCap/EV (%) Outliers", all_outliers, columns_info)
+                print_table("Statistical MCap/EV (%) Outliers", all_outliers, columns_info)
 
 def print_mcap_ev_table(title, dataframe, industry_bounds, small_industries):
     if not dataframe.empty:
-        dataframe['Note'] = dataframe.apply(get_outlier_note, axis=1, args=(industry_bounds, small_industries))
+        dataframe['Note'] = get_outlier_notes(dataframe, industry_bounds, small_industries)
     columns_info = [
         ('Symbol', 'Symbol', None),
         ('IndustryName', 'Industry', None),
@@ -199,7 +140,7 @@ def print_mcap_ev_table(title, dataframe, industry_bounds, small_industries):
         ('VaR_to_Ask_Ratio', 'VaR/Ask Ratio', None),
         ('Note', 'Note', None)
     ]
-    _print_table(title, dataframe, columns_info)
+    print_table(title, dataframe, columns_info)
 
 
 def find_mcap_ev_outliers(filename, overwrite=False):
@@ -209,34 +150,38 @@ def find_mcap_ev_outliers(filename, overwrite=False):
     """
     try:
         global TOP_N_DISPLAY
-        file_type = "Unknown"
-        if re.search(r'Stocks', filename, re.IGNORECASE):
-            file_type = "Stocks"
-            TOP_N_DISPLAY = STOCKS_TOP
-        elif re.search(r'CFD', filename, re.IGNORECASE):
-            file_type = "CFD"
-            TOP_N_DISPLAY = CFD_TOP
-        elif re.search(r'Futures', filename, re.IGNORECASE):
-            file_type = "Futures"
-            TOP_N_DISPLAY = FUTURES_TOP
+        # Case-insensitive substring match; the first file type found in the filename wins
+        filename_lower = filename.lower()
+        file_type = next((name for name in FILE_TYPE_TOPS if name.lower() in filename_lower), "Unknown")
+        TOP_N_DISPLAY = FILE_TYPE_TOPS.get(file_type, TOP_N_DISPLAY)
         
         print(f"Detected file type: {file_type}. Displaying top/bottom {TOP_N_DISPLAY} assets at end.")
 
-        df = pd.read_csv(filename, delimiter=';')
+        df = read_input_csv(filename)
         df.columns = df.columns.str.strip()
 
+        # Industry and sector names repeat heavily, so compare and group them as integer-coded categories
+        for col in ['IndustryName', 'SectorName']:
+            if col in df.columns:
+                df[col] = df[col].astype('category')
+
+        # Coerce the ratio to float64 once; stray text becomes NaN and -inf marks an invalid value
+        mcap_ev = df['MCap/EV (%)']
+        if not pd.api.types.is_numeric_dtype(mcap_ev):
+            mcap_ev = mcap_ev.astype(str).str.strip()
+        mcap_ev = pd.to_numeric(mcap_ev, errors='coerce').astype(np.float64)
+        invalid_mask = np.isneginf(mcap_ev.to_numpy())
+
         # Check for symbols with invalid values before cleaning
-        if 'MCap/EV (%)' in df.columns and 'Symbol' in df.columns:
-            # Using .astype(str).str.strip() to safely handle different dtypes and whitespace
-            invalid_mask = df['MCap/EV (%)'].astype(str).str.strip() == '-inf'
+        if 'Symbol' in df.columns:
             for symbol in df.loc[invalid_mask, 'Symbol']:
                 print(f"WARNING: {symbol} has an invalid MCap/EV (%) value and will be excluded.")
 
-        df = df[df['MCap/EV (%)'] != -np.inf] # Exclude rows with -inf
+        df['MCap/EV (%)'] = mcap_ev
+        df = df[~invalid_mask] # Exclude rows with -inf
 
-        required_columns = ['Symbol', 'SectorName', 'IndustryName', 'MCap/EV (%)', 'TradeMode', 'AskPrice', 'BidPrice', 'VaR_to_Ask_Ratio']
-        if not all(col in df.columns for col in required_columns):
-            print(f"Warning: Some required columns are missing. Analysis might be incomplete. Missing: {[col for col in required_columns if col not in df.columns]}")
+        if not all(col in df.columns for col in REQUIRED_COLUMNS):
+            print(f"Warning: Some required columns are missing. Analysis might be incomplete. Missing: {[col for col in REQUIRED_COLUMNS if col not in df.columns]}")
         
         # Ensure AskPrice is treated as numeric, coercing errors to NaN
         if 'AskPrice' in df.columns:
@@ -258,46 +203,47 @@ def find_mcap_ev_outliers(filename, overwrite=False):
         df['TradeMode'] = pd.to_numeric(df['TradeMode'], errors='coerce')
         
         # Identify unactionable symbols based on TradeMode == 3
-        unactionable_symbols_df = df[df['TradeMode'] == 3][['Symbol', 'IndustryName']].copy()
+        close_only_mask = df['TradeMode'].to_numpy() == 3
+        unactionable_symbols_df = df.loc[close_only_mask, ['Symbol', 'IndustryName']]
         
         # Filter out unactionable symbols from the main DataFrame for analysis
-        df = df[df['TradeMode'] != 3]
+        df = df.loc[~close_only_mask]
 
-        industry_counts = df['IndustryName'].value_counts()
-        
-        large_industries = industry_counts[industry_counts >= MINIMUM_GROUP_SIZE].index.tolist()
-        small_industries = industry_counts[industry_counts < MINIMUM_GROUP_SIZE].index.tolist()
+        # Small industries are skipped by analyze_group and aggregated by sector below
+        industry_groups = df.groupby('IndustryName', sort=True, observed=True)
+        industry_counts = industry_groups.size()
+        small_industries = frozenset(industry_counts.index[industry_counts < MINIMUM_GROUP_SIZE])
 
         industry_bounds = {}
 
-        for industry in sorted(large_industries):
-            industry_df = df[df['IndustryName'] == industry].copy()
-            analyze_group(industry, industry_df, bounds_dict=industry_bounds, small_industries_list=small_industries)
+        industry_quartiles = get_group_quartiles(industry_groups)
+        for industry, industry_df in industry_groups:
+            analyze_group(industry, industry_df, bounds_dict=industry_bounds, small_industries_list=small_industries, quartiles=industry_quartiles.loc[industry])
 
         if small_industries:
-            small_industries_df = df[df['IndustryName'].isin(small_industries)].copy()
-            sectors_with_small_industries = small_industries_df['SectorName'].unique().tolist()
+            small_industries_df = df[df['IndustryName'].isin(small_industries)]
             
-            miscellaneous_industries = []
-            for sector in sorted(sectors_with_small_industries):
-                sector_df = small_industries_df[small_industries_df['SectorName'] == sector]
+            miscellaneous_positions = []
+            sector_groups = small_industries_df.groupby('SectorName', sort=True, observed=True)
+            sector_quartiles = get_group_quartiles(sector_groups)
+            for sector, sector_df in sector_groups:
                 if len(sector_df) >= MINIMUM_GROUP_SIZE:
                     aggregated_group_name = f"AGGREGATED {sector.upper()} INDUSTRIES"
-                    analyze_group(aggregated_group_name, sector_df, bounds_dict=industry_bounds, small_industries_list=small_industries)
+                    analyze_group(aggregated_group_name, sector_df, bounds_dict=industry_bounds, small_industries_list=small_industries, quartiles=sector_quartiles.loc[sector])
                 else:
-                    miscellaneous_industries.append(sector_df)
+                    miscellaneous_positions.append(sector_groups.indices[sector])
             
-            if miscellaneous_industries:
-                miscellaneous_df = pd.concat(miscellaneous_industries)
+            if miscellaneous_positions:
+                # One positional slice of the small-industry frame, in the same sector order as the loop
+                miscellaneous_df = small_industries_df.iloc[np.concatenate(miscellaneous_positions)]
                 if len(miscellaneous_df) >= MINIMUM_GROUP_SIZE:
                     analyze_group("AGGREGATED MISCELLANEOUS", miscellaneous_df, bounds_dict=industry_bounds, small_industries_list=small_industries)
                 else:
                     print(f"\nNOTE: A miscellaneous group of {len(miscellaneous_df)} instruments was formed but was too small to analyze (minimum size: {MINIMUM_GROUP_SIZE}).")
 
-        global_tradable_stocks_with_etfs = df.copy()
+        global_tradable_stocks_with_etfs = df
 
-        global_Q1 = global_tradable_stocks_with_etfs['MCap/EV (%)'].quantile(0.25)
-        global_Q3 = global_tradable_stocks_with_etfs['MCap/EV (%)'].quantile(0.75)
+        global_Q1, global_Q3 = get_quartiles(global_tradable_stocks_with_etfs['MCap/EV (%)'])
         global_IQR = global_Q3 - global_Q1
         global_lower_bound = global_Q1 - 1.5 * global_IQR
         global_upper_bound = global_Q3 + 1.5 * global_IQR
@@ -309,16 +255,16 @@ def find_mcap_ev_outliers(filename, overwrite=False):
         print(f"Lower Outlier Bound: {global_lower_bound:.4f}")
         print(f"Upper Outlier Bound: {global_upper_bound:.4f}")
 
-        top_n_highest_mcap_ev = global_tradable_stocks_with_etfs.sort_values(by='MCap/EV (%)', ascending=False).head(TOP_N_DISPLAY)
+        top_n_highest_mcap_ev = global_tradable_stocks_with_etfs.nlargest(TOP_N_DISPLAY, 'MCap/EV (%)')
         print_mcap_ev_table(f"Top {TOP_N_DISPLAY} Highest MCap/EV (%) Assets", top_n_highest_mcap_ev, industry_bounds, small_industries)
 
-        bottom_n_lowest_mcap_ev = global_tradable_stocks_with_etfs.sort_values(by='MCap/EV (%)', ascending=True).head(TOP_N_DISPLAY)
+        bottom_n_lowest_mcap_ev = global_tradable_stocks_with_etfs.nsmallest(TOP_N_DISPLAY, 'MCap/EV (%)')
         print_mcap_ev_table(f"Bottom {TOP_N_DISPLAY} Lowest MCap/EV (%) Assets", bottom_n_lowest_mcap_ev, industry_bounds, small_industries)
 
         if not unactionable_symbols_df.empty:
             print(f"\n{'='*25} Unactionable (Close-Only) Symbols {'='*25}")
-            for index, row in unactionable_symbols_df.iterrows():
-                print(f"- {row['Symbol']} ({row['IndustryName']})")
+            for symbol, industry in unactionable_symbols_df[['Symbol', 'IndustryName']].itertuples(index=False, name=None):
+                print(f"- {symbol} ({industry})")
 
     except FileNotFoundError:
         print(f"Error: The file '{filename}' was not found.")
@@ -340,7 +286,7 @@ if __name__ == "__main__":
     
     try:
         # Open the output file in write mode
-        with open(output_filename, 'w') as f:
+        with open(output_filename, 'w', buffering=1 << 20) as f:
             # Redirect stdout to a Tee object that writes to both the file and original stdout
             sys.stdout = Tee(f, original_stdout)
             print(f"Analysis results for {args.filename}")
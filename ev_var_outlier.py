@@ -1,17 +1,18 @@
 import pandas as pd
 import numpy as np
-import re
 import argparse
 import sys # Import sys to redirect stdout
 import os # Import os for path manipulation
+from tableprint import print_table
+from outlier_common import read_input_csv, get_quartiles, classify_outliers, get_aggregated_sector_names, get_group_names
 
 class Tee(object):
     def __init__(self, *files):
         self.files = files
     def write(self, obj):
+        # Leave flushing to the streams' own buffering; a flush per write is a syscall per print
         for f in self.files:
             f.write(obj)
-            f.flush()
     def flush(self):
         for f in self.files:
             f.flush()
@@ -21,116 +22,73 @@ STOCKS_TOP = 50 # User-defined variable for top/bottom N display for Stocks
 CFD_TOP = 40    # User-defined variable for top/bottom N display for CFDs
 FUTURES_TOP = 5 # User-defined variable for top/bottom N display for Futures
 TOP_N_DISPLAY = 20 # User-defined variable for top/bottom N display (will be set dynamically)
-
-def get_outlier_note(row, mcap_bounds, var_bounds, small_industries_list):
-    industry = row['IndustryName']
-    sector = row['SectorName']
-    mcap_ratio = row['MCap/EV (%)']
-    var_ratio = row['VaR_to_Ask_Ratio']
-
-    group_name = industry
-    if industry in small_industries_list:
-        group_name = f"AGGREGATED {sector.upper()} INDUSTRIES"
-        if sector == 'Undefined':
-            group_name = "AGGREGATED MISCELLANEOUS"
-
-    mcap_note = ''
-    if group_name in mcap_bounds:
-        bounds = mcap_bounds[group_name]
-        if mcap_ratio < bounds['lower']:
-            mcap_note = 'MCap/EV (LOW)'
-        elif mcap_ratio > bounds['upper']:
-            mcap_note = 'MCap/EV (HIGH)'
-
-    var_note = ''
-    if group_name in var_bounds:
-        bounds = var_bounds[group_name]
-        if var_ratio < bounds['lower']:
-            var_note = 'VaR (LOW)'
-        elif var_ratio > bounds['upper']:
-            var_note = 'VaR (HIGH)'
-
+FILE_TYPE_TOPS = {'Stocks': STOCKS_TOP, 'CFD': CFD_TOP, 'Futures': FUTURES_TOP} # Checked in this order against the filename
+TABLE_MIN_WIDTHS = {'AskPrice': 10, 'Spread %': 10, 'VaR_to_Ask_Ratio': 15} # Minimum widths on top of tableprint's defaults
+
+def _get_group_bounds(group_keys, mcap_bounds, var_bounds, side):
+    # (G + 1, 2) bounds per group for both ratios; the trailing NaN row serves the -1 code of rows without a group
+    group_bounds = np.column_stack([mcap_bounds[side].reindex(group_keys), var_bounds[side].reindex(group_keys)])
+    return np.vstack([group_bounds, np.full((1, 2), np.nan)])
+
+def get_outlier_flags(df, mcap_bounds, var_bounds, small_industries_list):
+    group_codes, group_keys = pd.factorize(get_group_names(df, small_industries_list))
+    group_keys = pd.Index(group_keys)
+
+    # Both ratios as one (N, 2) array, compared against their gathered (N, 2) bounds in a single pass.
+    # Groups without calculated bounds hold NaN, which never compares as an outlier
+    ratios = df[['MCap/EV (%)', 'VaR_to_Ask_Ratio']].to_numpy(dtype=np.float64)
+    lower = _get_group_bounds(group_keys, mcap_bounds, var_bounds, 'lower')[group_codes]
+    upper = _get_group_bounds(group_keys, mcap_bounds, var_bounds, 'upper')[group_codes]
+    flags = classify_outliers(ratios, lower, upper)
+    return flags[:, 0], flags[:, 1]
+
+def _build_note(mcap_flag, var_flag):
+    mcap_note = {-1: 'MCap/EV (LOW)', 1: 'MCap/EV (HIGH)'}.get(mcap_flag)
+    var_note = {-1: 'VaR (LOW)', 1: 'VaR (HIGH)'}.get(var_flag)
     if mcap_note and var_note:
         return f"Dual Outlier: {mcap_note}, {var_note}"
     elif mcap_note:
         return f"MCap/EV Outlier: {mcap_note}"
     return ''
 
-def analyze_group(group_name, group_df, mcap_bounds, var_bounds):
-    if len(group_df) < MINIMUM_GROUP_SIZE:
-        return
-
-    for ratio_col, bounds_dict in [('MCap/EV (%)', mcap_bounds), ('VaR_to_Ask_Ratio', var_bounds)]:
-        Q1 = group_df[ratio_col].quantile(0.25)
-        Q3 = group_df[ratio_col].quantile(0.75)
+# Every note indexed by (mcap_flag + 1, var_flag + 1), so notes are looked up rather than formatted per row
+OUTLIER_NOTES = np.array([[_build_note(m, v) for v in (-1, 0, 1)] for m in (-1, 0, 1)], dtype=object)
+
+def get_outlier_notes(mcap_flags, var_flags, index):
+    # Only MCap/EV outliers carry a note, so every other row keeps the empty default
+    notes = np.full(len(index), '', dtype=object)
+    candidates = mcap_flags != 0
+    notes[candidates] = OUTLIER_NOTES[mcap_flags[candidates] + 1, var_flags[candidates] + 1]
+    return pd.Series(notes, index=index)
+
+def get_bound_groups(df, small_industries_list):
+    # Large industries are their own group, small industries pool by sector, and sectors
+    # still under the minimum size pool together into the miscellaneous group
+    is_small = df['IndustryName'].isin(small_industries_list)
+    sector_counts = df.loc[is_small].groupby('SectorName', observed=True).size()
+    pooled_sectors = sector_counts.index[sector_counts >= MINIMUM_GROUP_SIZE]
+    aggregated_names = get_aggregated_sector_names(df['SectorName'])
+    aggregated_names = aggregated_names.where(df['SectorName'].isin(pooled_sectors) | df['SectorName'].isna(), "AGGREGATED MISCELLANEOUS")
+    return aggregated_names.where(is_small, df['IndustryName'])
+
+def calculate_bounds(df, bound_groups):
+    if df.empty:
+        no_bounds = pd.DataFrame(columns=['lower', 'upper'], dtype=np.float64)
+        return no_bounds, no_bounds
+
+    # One grouped pass yields the 0.25/0.75 quantiles of both ratios for every group
+    grouped = df.groupby(bound_groups, sort=False)
+    group_sizes = grouped.size()
+    quartiles = grouped[['MCap/EV (%)', 'VaR_to_Ask_Ratio']].quantile([0.25, 0.75]).unstack()
+
+    bounds = []
+    for ratio_col in ['MCap/EV (%)', 'VaR_to_Ask_Ratio']:
+        Q1, Q3 = quartiles[ratio_col, 0.25], quartiles[ratio_col, 0.75]
         IQR = Q3 - Q1
-        if IQR > 0:
-            lower_bound = Q1 - 1.5 * IQR
-            upper_bound = Q3 + 1.5 * IQR
-            bounds_dict[group_name] = {'lower': lower_bound, 'upper': upper_bound}
-
-def _print_table(title, dataframe, columns_info):
-    print(f"\n\n{'='*25} {title} {'='*25}")
-    if dataframe.empty:
-        print("No outliers found in this category.")
-        return
-
-    # Calculate column widths
-    column_widths = {}
-    for col_df_name, col_header, col_format in columns_info:
-        max_len = len(col_header)
-        if col_df_name in dataframe.columns:
-            if col_format:
-                if col_format.endswith('%'):
-                    # Handle percentage formatting separately
-                    base_format = col_format[:-1] # Remove the %
-                    formatted_data = dataframe[col_df_name].apply(lambda x: f"{x:{base_format}}%")
-                else:
-                    formatted_data = dataframe[col_df_name].apply(lambda x: f"{x:{col_format}}")
-                max_len = max(max_len, formatted_data.str.len().max())
-            else:
-                max_len = max(max_len, dataframe[col_df_name].astype(str).str.len().max())
-        column_widths[col_df_name] = max_len
-
-    # Adjust for specific columns that might have fixed width requirements or minimums
-    column_widths['Symbol'] = max(column_widths.get('Symbol', 0), 10)
-    column_widths['IndustryName'] = max(column_widths.get('IndustryName', 0), 40)
-    column_widths['MCap/EV (%)'] = max(column_widths.get('MCap/EV (%)', 0), 15)
-    column_widths['AskPrice'] = max(column_widths.get('AskPrice', 0), 10)
-    column_widths['Spread %'] = max(column_widths.get('Spread %', 0), 10)
-    column_widths['VaR_to_Ask_Ratio'] = max(column_widths.get('VaR_to_Ask_Ratio', 0), 15)
-    column_widths['Note'] = max(column_widths.get('Note', 0), 4) # Minimum for 'Note'
-
-    # Print header
-    header_parts = []
-    for col_df_name, col_header, _ in columns_info:
-        header_parts.append(f"{col_header:<{column_widths[col_df_name]}}")
-    header_line = " | ".join(header_parts)
-    print("-" * len(header_line))
-    print(header_line)
-    print("-" * len(header_line))
-
-    # Print data rows
-    for _, row in dataframe.iterrows():
-        row_parts = []
-        for col_df_name, _, col_format in columns_info:
-            value = row[col_df_name]
-            formatted_value_str = ""
-            if pd.isna(value):
-                formatted_value_str = "N/A" # Or an empty string, depending on preference
-            elif col_format:
-                if col_format.endswith('%'):
-                    base_format = col_format[:-1]
-                    formatted_value_str = f"{value:{base_format}}%"
-                else:
-                    formatted_value_str = f"{value:{col_format}}"
-            else:
-                formatted_value_str = str(value)
-            
-            row_parts.append(formatted_value_str.ljust(column_widths[col_df_name]))
-        print(" | ".join(row_parts))
-    print("-" * len(header_line))
-
+        # Groups that are too small or have no statistical range to measure get no bounds
+        has_bounds = (group_sizes >= MINIMUM_GROUP_SIZE) & (IQR > 0)
+        bounds.append(pd.DataFrame({'lower': Q1 - 1.5 * IQR, 'upper': Q3 + 1.5 * IQR})[has_bounds])
+    return bounds[0], bounds[1]
 
 def print_outlier_table(title, dataframe):
     columns_info = [
@@ -142,28 +100,27 @@ def print_outlier_table(title, dataframe):
         ('VaR_to_Ask_Ratio', 'VaR/Ask Ratio', None),
         ('Note', 'Note', None)
     ]
-    _print_table(title, dataframe, columns_info)
+    print_table(title, dataframe, columns_info, min_widths=TABLE_MIN_WIDTHS)
 
 def find_dual_outliers(filename):
     try:
         global TOP_N_DISPLAY # Added this line to allow modification of TOP_N_DISPLAY
 
-        file_type = "Unknown"
-        if re.search(r'Stocks', filename, re.IGNORECASE):
-            file_type = "Stocks"
-            TOP_N_DISPLAY = STOCKS_TOP
-        elif re.search(r'CFD', filename, re.IGNORECASE):
-            file_type = "CFD"
-            TOP_N_DISPLAY = CFD_TOP
-        elif re.search(r'Futures', filename, re.IGNORECASE):
-            file_type = "Futures"
-            TOP_N_DISPLAY = FUTURES_TOP
+        # Case-insensitive substring match; the first file type found in the filename wins
+        filename_lower = filename.lower()
+        file_type = next((name for name in FILE_TYPE_TOPS if name.lower() in filename_lower), "Unknown")
+        TOP_N_DISPLAY = FILE_TYPE_TOPS.get(file_type, TOP_N_DISPLAY)
         
         print(f"Detected file type: {file_type}. Displaying top/bottom {TOP_N_DISPLAY} assets at end.")
 
-        df = pd.read_csv(filename, delimiter=';')
+        df = read_input_csv(filename)
         df.columns = df.columns.str.strip()
 
+        # Industry and sector names repeat heavily, so compare and group them as integer-coded categories
+        for col in ['IndustryName', 'SectorName']:
+            if col in df.columns:
+                df[col] = df[col].astype('category')
+
         # Ensure numeric types for relevant columns, coercing errors to NaN
         numeric_cols = ['MCap/EV (%)', 'AskPrice', 'BidPrice', 'VaR_to_Ask_Ratio', 'TradeMode']
         for col in numeric_cols:
@@ -177,78 +134,64 @@ def find_dual_outliers(filename):
             print("Warning: BidPrice or AskPrice not found. Cannot calculate Spread %.")
             df['Spread %'] = np.nan
 
-        # Handle inf/-inf values by replacing them with NaN
-        df = df.replace([np.inf, -np.inf], np.nan)
+        # Rows need finite MCap/EV (%) and VaR_to_Ask_Ratio values, as these are critical for analysis
+        mcap_values = df['MCap/EV (%)'].to_numpy(dtype=np.float64)
+        var_values = df['VaR_to_Ask_Ratio'].to_numpy(dtype=np.float64)
+        valid_mask = np.isfinite(mcap_values) & np.isfinite(var_values)
+        df['MCap/EV (%)'] = mcap_values
+        df['VaR_to_Ask_Ratio'] = var_values
+        # The printed prices and spreads show inf as N/A, like the missing values
+        for col in ['AskPrice', 'Spread %']:
+            if col in df.columns:
+                df[col] = df[col].replace([np.inf, -np.inf], np.nan)
 
-        # Drop rows where MCap/EV (%) or VaR_to_Ask_Ratio are NaN, as these are critical for analysis
-        df = df.dropna(subset=['MCap/EV (%)', 'VaR_to_Ask_Ratio'])
+        # Identify unactionable symbols based on TradeMode == 3, then slice the analysis rows once
+        close_only_mask = df['TradeMode'].to_numpy() == 3
+        close_only_symbols = df.loc[valid_mask & close_only_mask, ['Symbol', 'IndustryName']]
+        df = df.loc[valid_mask & ~close_only_mask] # Exclude invalid and unactionable rows from analysis
 
-        # Identify unactionable symbols based on TradeMode == 3
-        unactionable_symbols_df = df[df['TradeMode'] == 3][['Symbol', 'IndustryName']].copy()
-        df = df[df['TradeMode'] != 3] # Exclude unactionable from analysis
+        industry_counts = df.groupby('IndustryName', observed=True).size()
+        small_industries = frozenset(industry_counts.index[industry_counts < MINIMUM_GROUP_SIZE])
 
-        # Initialize close_only_symbols as an empty DataFrame if no unactionable symbols are found
-        if unactionable_symbols_df.empty:
-            close_only_symbols = pd.DataFrame(columns=['Symbol', 'IndustryName'])
-        else:
-            close_only_symbols = unactionable_symbols_df
-
-        industry_counts = df['IndustryName'].value_counts()
-        large_industries = industry_counts[industry_counts >= MINIMUM_GROUP_SIZE].index.tolist()
-        small_industries = industry_counts[industry_counts < MINIMUM_GROUP_SIZE].index.tolist()
-
-        mcap_bounds, var_bounds = {}, {}
-
-        for industry in sorted(large_industries):
-            industry_df = df[df['IndustryName'] == industry]
-            analyze_group(industry, industry_df, mcap_bounds, var_bounds)
-
-        if small_industries:
-            small_industries_df = df[df['IndustryName'].isin(small_industries)]
-            sectors = small_industries_df['SectorName'].unique()
-            miscellaneous_industries = []
-            for sector in sorted(sectors):
-                sector_df = small_industries_df[small_industries_df['SectorName'] == sector]
-                if len(sector_df) >= MINIMUM_GROUP_SIZE:
-                    analyze_group(f"AGGREGATED {sector.upper()} INDUSTRIES", sector_df, mcap_bounds, var_bounds)
-                else:
-                    miscellaneous_industries.append(sector_df)
-            
-            if miscellaneous_industries:
-                miscellaneous_df = pd.concat(miscellaneous_industries)
-                if len(miscellaneous_df) >= MINIMUM_GROUP_SIZE:
-                    analyze_group("AGGREGATED MISCELLANEOUS", miscellaneous_df, mcap_bounds, var_bounds)
+        # Every row's bound group as one key, so all bounds come from a single groupby
+        bound_groups = get_bound_groups(df, small_industries)
+        mcap_bounds, var_bounds = calculate_bounds(df, bound_groups)
 
-        df['Note'] = df.apply(get_outlier_note, axis=1, args=(mcap_bounds, var_bounds, small_industries))
+        mcap_flags, var_flags = get_outlier_flags(df, mcap_bounds, var_bounds, small_industries)
+        df['Note'] = get_outlier_notes(mcap_flags, var_flags, df.index)
         
         # Consolidate Outliers
-        dual_outliers = df[df['Note'].str.contains('Dual Outlier')].copy()
-        mcap_outliers = df[df['Note'].str.contains('MCap/EV Outlier')].copy()
+        is_mcap_outlier = mcap_flags != 0
+        is_var_outlier = var_flags != 0
+        # Read-only slices; only the top/bottom VaR subsets below get a Note suffix, so only they are copied
+        dual_outliers = df[is_mcap_outlier & is_var_outlier]
+        mcap_outliers = df[is_mcap_outlier & ~is_var_outlier]
 
         # Get the top/bottom N VaR assets from the original df
-        bottom_n_var_symbols = df.sort_values(by='VaR_to_Ask_Ratio', ascending=True).head(TOP_N_DISPLAY)['Symbol']
-        top_n_var_symbols = df.sort_values(by='VaR_to_Ask_Ratio', ascending=False).head(TOP_N_DISPLAY)['Symbol']
+        # Only the symbols are needed, so select from the two columns rather than the whole frame
+        var_symbols = df[['Symbol', 'VaR_to_Ask_Ratio']]
+        bottom_n_var_symbols = set(var_symbols.nsmallest(TOP_N_DISPLAY, 'VaR_to_Ask_Ratio')['Symbol'].tolist())
+        top_n_var_symbols = set(var_symbols.nlargest(TOP_N_DISPLAY, 'VaR_to_Ask_Ratio')['Symbol'].tolist())
         
         # Filter mcap_outliers to get those also in bottom_n_var_symbols
         mcap_in_bottom_n = mcap_outliers[mcap_outliers['Symbol'].isin(bottom_n_var_symbols)].copy()
         if not mcap_in_bottom_n.empty:
-            mcap_in_bottom_n['Note'] = mcap_in_bottom_n['Note'].apply(lambda x: f"{x} in Bottom {TOP_N_DISPLAY} VaR")
+            mcap_in_bottom_n['Note'] = mcap_in_bottom_n['Note'] + f" in Bottom {TOP_N_DISPLAY} VaR"
         mcap_in_bottom_n = mcap_in_bottom_n[['Symbol', 'IndustryName', 'MCap/EV (%)', 'AskPrice', 'Spread %', 'VaR_to_Ask_Ratio', 'Note']]
 
         # Filter mcap_outliers to get those also in top_n_var_symbols
         mcap_in_top_n = mcap_outliers[mcap_outliers['Symbol'].isin(top_n_var_symbols)].copy()
         if not mcap_in_top_n.empty:
-            mcap_in_top_n['Note'] = mcap_in_top_n['Note'].apply(lambda x: f"{x} in Top {TOP_N_DISPLAY} VaR")
+            mcap_in_top_n['Note'] = mcap_in_top_n['Note'] + f" in Top {TOP_N_DISPLAY} VaR"
         mcap_in_top_n = mcap_in_top_n[['Symbol', 'IndustryName', 'MCap/EV (%)', 'AskPrice', 'Spread %', 'VaR_to_Ask_Ratio', 'Note']]
         
         actionable_outliers = pd.concat([dual_outliers, mcap_in_bottom_n, mcap_in_top_n]).drop_duplicates(subset=['Symbol']).sort_values(by='MCap/EV (%)', ascending=False)
 
         print_outlier_table("Actionable Outliers", actionable_outliers)
 
-        global_tradable_stocks_with_etfs = df.copy()
+        global_tradable_stocks_with_etfs = df
 
-        global_Q1 = global_tradable_stocks_with_etfs['MCap/EV (%)'].quantile(0.25)
-        global_Q3 = global_tradable_stocks_with_etfs['MCap/EV (%)'].quantile(0.75)
+        global_Q1, global_Q3 = get_quartiles(global_tradable_stocks_with_etfs['MCap/EV (%)'])
         global_IQR = global_Q3 - global_Q1
         global_lower_bound = global_Q1 - 1.5 * global_IQR
         global_upper_bound = global_Q3 + 1.5 * global_IQR
@@ -260,16 +203,16 @@ def find_dual_outliers(filename):
         print(f"Lower Outlier Bound: {global_lower_bound:.4f}")
         print(f"Upper Outlier Bound: {global_upper_bound:.4f}")
 
-        top_n_highest_mcap_ev = global_tradable_stocks_with_etfs.sort_values(by='MCap/EV (%)', ascending=False).head(TOP_N_DISPLAY)
+        top_n_highest_mcap_ev = global_tradable_stocks_with_etfs.nlargest(TOP_N_DISPLAY, 'MCap/EV (%)')
         print_outlier_table(f"Top {TOP_N_DISPLAY} Highest MCap/EV (%) Assets", top_n_highest_mcap_ev)
 
-        bottom_n_lowest_mcap_ev = global_tradable_stocks_with_etfs.sort_values(by='MCap/EV (%)', ascending=True).head(TOP_N_DISPLAY)
+        bottom_n_lowest_mcap_ev = global_tradable_stocks_with_etfs.nsmallest(TOP_N_DISPLAY, 'MCap/EV (%)')
         print_outlier_table(f"Bottom {TOP_N_DISPLAY} Lowest MCap/EV (%) Assets", bottom_n_lowest_mcap_ev)
 
         if not close_only_symbols.empty:
             print(f"\n\n{'='*25} Unactionable (Close-Only) Symbols {'='*25}")
-            for _, row in close_only_symbols.iterrows():
-                print(f"- {row['Symbol']} ({row['IndustryName']})")
+            for symbol, industry in close_only_symbols[['Symbol', 'IndustryName']].itertuples(index=False, name=None):
+                print(f"- {symbol} ({industry})")
 
     except FileNotFoundError:
         print(f"Error: The file '{filename}' was not found.")
@@ -289,7 +232,7 @@ if __name__ == "__main__":
     original_stdout = sys.stdout
     
     try:
-        with open(output_filename, 'w') as f:
+        with open(output_filename, 'w', buffering=1 << 20) as f:
             sys.stdout = Tee(f, original_stdout)
             print(f"Analysis results for {args.filename}")
             print(f"Report generated on: {pd.Timestamp.now()}\n")
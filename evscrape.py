@@ -3,10 +3,27 @@ import pandas as pd
 import numpy as np
 import argparse
 import os
-import sys
-from io import StringIO
+import time
+import logging
+import sqlite3
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import closing
 from datetime import date
 
+try:
+    import pyarrow as pa
+    import pyarrow.csv as pa_csv
+except ImportError:
+    pa = None
+
+MAX_WORKERS = 16 # Concurrent yfinance lookups; scraping is bound by network round-trips, not CPU
+SCRAPED_COLUMNS = ['Enterprise Value', 'Market Cap', 'Next Earnings Date', 'Next Dividend Date']
+CACHE_PATH = 'evscrape_cache.sqlite' # On-disk cache of scraped results, shared between runs
+CACHE_EXPIRE_SECONDS = 3600 # Cached results older than this are scraped again
+
+# Silence yfinance's own error logging once; missing symbols are detected from the returned info instead
+logging.getLogger('yfinance').setLevel(logging.CRITICAL)
+
 def get_financial_data(ticker):
     """
     Retrieves enterprise value, market cap, next earnings date, and next dividend date for a given stock ticker.
@@ -18,20 +35,12 @@ def get_financial_data(ticker):
         tuple: A tuple containing enterprise value, market cap, next earnings date, and next dividend date.
                Returns (None, None, None, None) if the ticker is not found or an error occurs.
     """
-    # Redirect stderr to capture yfinance's direct error prints
-    old_stderr = sys.stderr
-    sys.stderr = captured_stderr = StringIO()
-
     try:
         stock = yfinance.Ticker(ticker)
         info = stock.info
 
-        # Restore stderr and get the captured output
-        sys.stderr = old_stderr
-        error_output = captured_stderr.getvalue()
-
-        # Check for 404 in the captured output or if info is invalid
-        if "404" in error_output or (not info or 'symbol' not in info):
+        # Unknown symbols come back without a usable info dict
+        if not info or 'symbol' not in info:
             print(f"Could not find data for {ticker}: Not Found (404). Handled.")
             return None, None, None, None
 
@@ -74,10 +83,142 @@ def get_financial_data(ticker):
         return enterprise_value, market_cap, next_earnings_date, next_dividend_date
 
     except Exception as e:
-        sys.stderr = old_stderr # Ensure stderr is restored on other errors
-        print(f"An unexpected error occurred for {ticker}: {e}")
+        # Some yfinance versions raise on a 404 instead of returning an empty info dict
+        if "404" in str(e):
+            print(f"Could not find data for {ticker}: Not Found (404). Handled.")
+        else:
+            print(f"An unexpected error occurred for {ticker}: {e}")
         return None, None, None, None
 
+def scrape_symbol(symbol):
+    """
+    Scrapes the financial data for one symbol from the CSV file.
+
+    Class shares such as "BRKb" are tried first as Yahoo's "BRK-B", then as written.
+
+    Args:
+        symbol (str): The symbol as written in the CSV file.
+
+    Returns:
+        tuple: The get_financial_data result for the symbol.
+    """
+    symbol_fix = symbol
+
+    if isinstance(symbol, str) and len(symbol) > 2 and symbol.endswith(('a', 'b')):
+        class_s = symbol[-1].upper()
+        base = symbol[:-1]
+        symbol_fix = f"{base}-{class_s}"
+        print(f"Scraping {symbol} (trying as {symbol_fix})...")
+    else:
+         print(f"Scraping {symbol}...")
+
+    enterprise_value, market_cap, next_earnings_date, next_dividend_date = get_financial_data(symbol_fix)
+
+    if enterprise_value is None and market_cap is None and symbol_fix != symbol:
+        print(f"Could not find data for {symbol_fix}, trying original symbol {symbol}...")
+        enterprise_value, market_cap, next_earnings_date, next_dividend_date = get_financial_data(symbol)
+
+    return enterprise_value, market_cap, next_earnings_date, next_dividend_date
+
+def load_cached_data(cache):
+    """
+    Loads the unexpired scrape results from the on-disk cache.
+
+    Args:
+        cache (sqlite3.Connection): The open cache database.
+
+    Returns:
+        dict: The get_financial_data style result tuple for each cached symbol.
+    """
+    cache.execute(
+        "CREATE TABLE IF NOT EXISTS financial_data (symbol TEXT PRIMARY KEY, enterprise_value, market_cap, "
+        "next_earnings_date, next_dividend_date, fetched_at REAL)"
+    )
+    rows = cache.execute(
+        "SELECT symbol, enterprise_value, market_cap, next_earnings_date, next_dividend_date "
+        "FROM financial_data WHERE fetched_at >= ?",
+        (time.time() - CACHE_EXPIRE_SECONDS,),
+    )
+    return {symbol: tuple(result) for symbol, *result in rows}
+
+def save_cached_data(cache, results):
+    """
+    Stores scrape results in the on-disk cache.
+
+    Symbols that returned no data are not stored, so they are retried on the next run.
+
+    Args:
+        cache (sqlite3.Connection): The open cache database.
+        results (dict): The get_financial_data style result tuple for each scraped symbol.
+    """
+    fetched_at = time.time()
+    with cache:
+        cache.executemany(
+            "INSERT OR REPLACE INTO financial_data VALUES (?, ?, ?, ?, ?, ?)",
+            [
+                (symbol, *result, fetched_at) for symbol, result in results.items()
+                if isinstance(symbol, str) and (result[0] is not None or result[1] is not None)
+            ],
+        )
+
+def get_csv_text_frame(df):
+    """
+    Converts the columns pyarrow would format differently from DataFrame.to_csv into to_csv's text.
+
+    pyarrow writes the float 77.0 as "77" and True as "true", while to_csv writes str() of each
+    value ("77.0", "True") and leaves missing values empty. Integer and string columns are
+    written the same way by both, so they are left as they are.
+
+    Args:
+        df (pd.DataFrame): The data to write.
+
+    Returns:
+        pd.DataFrame: The frame with float64, boolean and object columns as text, or None if
+            to_csv's output is not reproduced for it: a column of another type (e.g. float32,
+            whose values to_csv prints at single precision, or datetimes), a header that needs
+            quoting or repeats a name, or a single column, where to_csv writes an empty
+            value as "".
+    """
+    header = [str(name) for name in df.columns]
+    if len(header) < 2 or len(set(header)) < len(header) or any(c in name for name in header for c in ';"\r\n'):
+        return None
+
+    columns = {}
+    for name, values in df.items():
+        if values.dtype in (object, np.float64, np.bool_):
+            columns[name] = values.astype(object).where(values.notna(), '').astype(str)
+        elif pd.api.types.is_integer_dtype(values.dtype) or pd.api.types.is_string_dtype(values.dtype):
+            columns[name] = values
+        else:
+            return None
+    return pd.DataFrame(columns, index=df.index)
+
+def write_csv(df, output_filename):
+    """
+    Writes a DataFrame as a semicolon-delimited CSV file.
+
+    pyarrow's multithreaded writer is used when it is installed and get_csv_text_frame can
+    reproduce to_csv's text for the frame. Other frames, and values that would need
+    quoting, are written by DataFrame.to_csv itself.
+
+    Args:
+        df (pd.DataFrame): The data to write.
+        output_filename (str): The path of the CSV file to write.
+    """
+    csv_df = get_csv_text_frame(df) if pa is not None else None
+    if csv_df is not None:
+        try:
+            table = pa.Table.from_pandas(csv_df, preserve_index=False)
+            write_options = pa_csv.WriteOptions(include_header=False, delimiter=';', quoting_style='none')
+            with open(output_filename, 'wb') as f:
+                # pyarrow always quotes the header, so the header line is written as pandas would write it
+                f.write((';'.join(map(str, df.columns)) + '\n').encode('utf-8'))
+                pa_csv.write_csv(table, f, write_options=write_options)
+            return
+        except pa.ArrowException:
+            pass
+    df.to_csv(output_filename, index=False, sep=';')
+
 def scrape_from_csv(csv_path):
     """
     Reads a CSV file of stock symbols and scrapes their enterprise value, market cap,
@@ -94,37 +235,45 @@ def scrape_from_csv(csv_path):
                 df[col] = None
 
         process_mask = ~((df['SectorName'] == 'Currency') | (df['IndustryName'] == 'Exchange Traded Fund'))
+        # Rows that already have an enterprise value are not scraped again
+        scrape_mask = process_mask & df['Enterprise Value'].isna()
+        scraped_index = df.index[scrape_mask]
+
+        symbols = df.loc[scrape_mask, 'Symbol'].tolist()
+
+        with closing(sqlite3.connect(CACHE_PATH)) as cache:
+            symbol_results = load_cached_data(cache)
+            # Cache hits skip the network entirely; only the rest go to the thread pool
+            missing_symbols = [symbol for symbol in dict.fromkeys(symbols) if symbol not in symbol_results]
+            if len(missing_symbols) < len(symbols):
+                print(f"Using cached data for {len(symbols) - len(missing_symbols)} symbols.")
+
+            # The lookups are network-bound, so they run concurrently; map returns results in symbol order
+            with ThreadPoolExecutor(max_workers=MAX_WORKERS) as executor:
+                fetched_results = dict(zip(missing_symbols, executor.map(scrape_symbol, missing_symbols)))
+            save_cached_data(cache, fetched_results)
+
+        symbol_results.update(fetched_results)
+        results = [symbol_results[symbol] for symbol in symbols]
 
-        for index, row in df[process_mask].iterrows():
-            if pd.notna(row.get('Enterprise Value')):
-                continue
-
-            symbol = row['Symbol']
-            symbol_fix = symbol
-            
-            if isinstance(symbol, str) and len(symbol) > 2 and symbol.endswith(('a', 'b')):
-                class_s = symbol[-1].upper()
-                base = symbol[:-1]
-                symbol_fix = f"{base}-{class_s}"
-                print(f"Scraping {symbol} (trying as {symbol_fix})...")
-            else:
-                 print(f"Scraping {symbol}...")
-
-            enterprise_value, market_cap, next_earnings_date, next_dividend_date = get_financial_data(symbol_fix)
-            
-            if enterprise_value is None and market_cap is None and symbol_fix != symbol:
-                print(f"Could not find data for {symbol_fix}, trying original symbol {symbol}...")
-                enterprise_value, market_cap, next_earnings_date, next_dividend_date = get_financial_data(symbol)
-
-            df.loc[index, 'Enterprise Value'] = enterprise_value
-            df.loc[index, 'Market Cap'] = market_cap
-            df.loc[index, 'Next Earnings Date'] = next_earnings_date
-            df.loc[index, 'Next Dividend Date'] = next_dividend_date
-            
-            if enterprise_value is not None and market_cap is not None and enterprise_value > 0:
-                df.loc[index, 'MCap/EV (%)'] = (market_cap / enterprise_value) * 100
-            else:
-                df.loc[index, 'MCap/EV (%)'] = np.nan
+        scraped_values = dict(zip(SCRAPED_COLUMNS, map(list, zip(*results))))
+        # Missing values become NaN, so the ratio is one array expression that is NaN unless EV is positive
+        enterprise_values = np.array([result[0] for result in results], dtype=np.float64)
+        market_caps = np.array([result[1] for result in results], dtype=np.float64)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            scraped_values['MCap/EV (%)'] = np.where(enterprise_values > 0, (market_caps / enterprise_values) * 100, np.nan)
+        # One assignment per column. A column keeps the dtype it was read with, so scraped numbers are written
+        # like the rows already there; only values that dtype cannot hold (e.g. dates in an empty float column)
+        # turn it into an object column
+        for col, values in scraped_values.items():
+            values = pd.Series(values, index=scraped_index, dtype=object)
+            column = df[col].copy()
+            try:
+                column.loc[scraped_index] = values if column.dtype == object else values.infer_objects()
+            except TypeError:
+                column = df[col].astype(object)
+                column.loc[scraped_index] = values
+            df[col] = column
 
         print("\nScraping complete. Results:")
         display_cols = ['Symbol', 'Enterprise Value', 'Market Cap', 'Next Earnings Date', 'Next Dividend Date', 'MCap/EV (%)']
@@ -135,7 +284,7 @@ def scrape_from_csv(csv_path):
              base, _ = os.path.splitext(csv_path)
              output_filename = f"{base}-EV.csv"
 
-        df.to_csv(output_filename, index=False, sep=';')
+        write_csv(df, output_filename)
         print(f"\nResults saved to {output_filename}")
 
     except FileNotFoundError:
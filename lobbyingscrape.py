@@ -1,15 +1,36 @@
 
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+import json
+import os
 import pandas as pd
 import argparse
+from datetime import date
 
 # --- USER-DEFINED VARIABLES ---
 
 # IMPORTANT: Replace with your own API key from https://lda.senate.gov/api/
 API_KEY = "YOUR_API_KEY_HERE"
 
+# Where the SEC's ticker list is cached, one file per day
+TICKER_CACHE_DIR = os.path.join(os.path.expanduser('~'), '.cache', 'secscrape')
+
+# Seconds to wait for a connection and for each response
+REQUEST_TIMEOUT = (5, 30)
+
 # --- HELPER FUNCTIONS ---
 
+def create_session():
+    """Creates a session that keeps connections alive and backs off on rate limits and server errors."""
+    session = requests.Session()
+    # The last response is returned rather than raised, so a persistent 429 still reaches the rate limit message
+    retry = Retry(total=3, backoff_factor=0.5, status_forcelist=[429, 500, 502, 503, 504], allowed_methods=["GET"], raise_on_status=False)
+    session.mount('https://', HTTPAdapter(max_retries=retry))
+    return session
+
+SESSION = create_session()
+
 def get_lobbying_data(company_name):
     """
     Fetches lobbying data for a given company name from the Senate.gov API.
@@ -23,7 +44,7 @@ def get_lobbying_data(company_name):
     headers = {'X-API-Key': API_KEY}
     
     try:
-        response = requests.get(api_url, headers=headers)
+        response = SESSION.get(api_url, headers=headers, timeout=REQUEST_TIMEOUT)
         response.raise_for_status()
         data = response.json()
         return data.get('results', [])
@@ -37,18 +58,36 @@ def get_lobbying_data(company_name):
         print(f"An error occurred: {e}")
         return None
 
-def get_cik(ticker):
-    """Gets the CIK number for a given stock ticker from the SEC's company ticker JSON."""
+def get_ticker_to_cik():
+    """Gets the ticker to CIK map, downloading the SEC's company ticker JSON at most once a day."""
+    cache_path = os.path.join(TICKER_CACHE_DIR, f"tickers-{date.today().strftime('%Y%m%d')}.json")
+    try:
+        with open(cache_path) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        pass
+
     url = "https://www.sec.gov/files/company_tickers.json"
     headers = {'User-Agent': 'My Scraper 1.0 contact@example.com'}
+    response = SESSION.get(url, headers=headers, timeout=REQUEST_TIMEOUT)
+    response.raise_for_status()
+    ticker_to_cik = {}
+    for company_data in response.json().values():
+        # The first listing of a ticker wins, as with the original linear scan
+        ticker_to_cik.setdefault(company_data.get('ticker'), str(company_data['cik_str']).zfill(10))
+
     try:
-        response = requests.get(url, headers=headers)
-        response.raise_for_status()
-        company_tickers = response.json()
-        for company_data in company_tickers.values():
-            if company_data.get('ticker') == ticker.upper():
-                return str(company_data['cik_str']).zfill(10)
-        return None
+        os.makedirs(TICKER_CACHE_DIR, exist_ok=True)
+        with open(cache_path, 'w') as f:
+            json.dump(ticker_to_cik, f)
+    except OSError as e:
+        print(f"WARNING: Could not cache the SEC ticker list: {e}")
+    return ticker_to_cik
+
+def get_cik(ticker):
+    """Gets the CIK number for a given stock ticker from the SEC's company ticker JSON."""
+    try:
+        return get_ticker_to_cik().get(ticker.upper())
     except Exception as e:
         print(f"Error fetching CIK data from SEC: {e}")
         return None
@@ -61,14 +100,14 @@ def display_lobbying_data(lobbying_data):
         print("No lobbying data found for the specified company.")
         return
 
-    df = pd.DataFrame(lobbying_data)
+    # Flattening the nested registrant/client dicts yields registrant_name and client_name directly
+    df = pd.json_normalize(lobbying_data, sep='_')
+    # If no record has a registrant or client dict, the flattened column is missing rather than empty
+    df = df.reindex(columns=df.columns.union(['registrant_name', 'client_name'], sort=False))
     
     # --- Data Cleaning and Formatting ---
-    # Extract and flatten nested data
     df['dt_posted'] = pd.to_datetime(df['dt_posted'], errors='coerce', utc=True).dt.strftime('%Y-%m-%d')
-    df['registrant_name'] = df['registrant'].apply(lambda x: x.get('name') if isinstance(x, dict) else None)
-    df['client_name'] = df['client'].apply(lambda x: x.get('name') if isinstance(x, dict) else None)
-    df['amount_reported'] = df.apply(lambda row: row['income'] if pd.notna(row['income']) else row['expenses'], axis=1)
+    df['amount_reported'] = df['income'].where(df['income'].notna(), df['expenses'])
     df['amount_reported'] = pd.to_numeric(df['amount_reported'], errors='coerce').fillna(0)
     df['issue_area_codes'] = df['lobbying_activities'].apply(lambda x: ', '.join([item['general_issue_code'] for item in x]) if isinstance(x, list) else None)
 
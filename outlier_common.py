@@ -0,0 +1,92 @@
+import pandas as pd
+import numpy as np
+
+# The columns both outlier scripts read from the input CSV
+REQUIRED_COLUMNS = ['Symbol', 'SectorName', 'IndustryName', 'MCap/EV (%)', 'TradeMode', 'AskPrice', 'BidPrice', 'VaR_to_Ask_Ratio']
+
+def read_input_csv(filename):
+    """
+    Loads only the REQUIRED_COLUMNS from a semicolon-delimited CSV file.
+
+    Args:
+        filename (str): The path to the CSV file.
+
+    Returns:
+        pd.DataFrame: The loaded data. Column names are not yet stripped.
+    """
+    # Header names may be padded, so match them stripped and pass the raw names to usecols
+    with open(filename, encoding='utf-8-sig') as f:
+        header = f.readline().rstrip('\r\n').split(';')
+    usecols = [name for name in header if name.strip() in REQUIRED_COLUMNS]
+
+    try:
+        # The pyarrow engine parses in parallel and reads floats exactly
+        return pd.read_csv(filename, delimiter=';', usecols=usecols, engine='pyarrow')
+    except ImportError:
+        return pd.read_csv(filename, delimiter=';', usecols=usecols)
+
+def get_aggregated_sector_names(sectors):
+    """
+    Builds the "AGGREGATED {SECTOR} INDUSTRIES" group name for each row's sector.
+
+    Args:
+        sectors (pd.Series): The categorical SectorName column.
+
+    Returns:
+        pd.Series: The aggregated group name for each row, NaN where the sector is missing.
+    """
+    # Upper-case and format each distinct sector once, then spread the names out by category code (-1 picks NaN)
+    categories = sectors.cat.categories
+    names = np.append(('AGGREGATED ' + categories.str.upper() + ' INDUSTRIES').to_numpy(dtype=object), np.nan)
+    return pd.Series(names[sectors.cat.codes.to_numpy()], index=sectors.index)
+
+def get_group_names(df, small_industries_list):
+    """
+    Determines the group each stock's outlier bounds were calculated under.
+
+    Args:
+        df (pd.DataFrame): The DataFrame containing the stocks.
+        small_industries_list (frozenset): The industries classified as small.
+
+    Returns:
+        pd.Series: The group name for each row, aligned with df.
+    """
+    # Small industries are checked against their aggregated sector group
+    aggregated_names = get_aggregated_sector_names(df['SectorName'])
+    aggregated_names = aggregated_names.where(df['SectorName'] != 'Undefined', "AGGREGATED MISCELLANEOUS")
+
+    # Otherwise, each stock is in its own industry group
+    return aggregated_names.where(df['IndustryName'].isin(small_industries_list), df['IndustryName'])
+
+def classify_outliers(values, lower, upper):
+    """
+    Flags values that fall outside their outlier bounds.
+
+    Args:
+        values (array-like): The ratio values to classify.
+        lower (float or array-like): The lower outlier bound(s).
+        upper (float or array-like): The upper outlier bound(s).
+
+    Returns:
+        np.ndarray: -1 for values below the lower bound, 1 for values above the
+                    upper bound, and 0 otherwise (including NaN values and bounds).
+    """
+    values = np.asarray(values, dtype=np.float64)
+    return (values > upper).astype(np.int8) - (values < lower).astype(np.int8)
+
+def get_quartiles(values):
+    """
+    Calculates the 25th and 75th percentiles with linear interpolation, matching Series.quantile.
+
+    Args:
+        values (array-like): The values to measure. NaN values are ignored.
+
+    Returns:
+        tuple: The (Q1, Q3) quartiles, or (nan, nan) if there are no values.
+    """
+    values = np.asarray(values, dtype=np.float64)
+    values = values[~np.isnan(values)]
+    if len(values) == 0:
+        return np.nan, np.nan
+    Q1, Q3 = np.quantile(values, [0.25, 0.75])
+    return Q1, Q3
@@ -1,50 +1,154 @@
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 import json
+import gzip
 import pandas as pd
+import numpy as np
 from datetime import datetime, timezone, date, timedelta
 import yfinance as yf
+import os
 import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+from operator import itemgetter
+
+# orjson parses the multi-megabyte SEC documents several times faster; the standard library is the fallback
+try:
+    from orjson import loads as json_loads
+except ImportError:
+    json_loads = json.loads
 
 # --- USER-DEFINED VARIABLES ---
 
-# User-defined variable to limit the number of filings to retrieve
-MAX_FILINGS = 100
+# Concurrent SEC requests; this bounds how many are open at once, not how often they are sent
+SEC_MAX_WORKERS = 8
+
+# The SEC asks for no more than 10 requests per second; sec_get spaces every request to stay under it
+SEC_MAX_REQUESTS_PER_SECOND = 8
+
+# Concurrent yfinance lookups for the per-ticker reports
+YF_MAX_WORKERS = 8
+
+# Where the SEC's ticker list and responses are cached, one file per day
+SEC_CACHE_DIR = os.path.join(os.path.expanduser('~'), '.cache', 'secscrape')
+
+# Seconds to wait for a connection and for each response
+SEC_TIMEOUT = (5, 30)
+
+SEC_HEADERS = {'User-Agent': 'My Scraper 1.0 contact@example.com', 'Accept-Encoding': 'gzip, deflate'}
+
+# The only company facts the Enterprise Value calculation reads
+EV_DEBT_TAGS = ['LongTermDebtAndCapitalLeaseObligations', 'DebtAndCapitalLeaseObligationsCurrent', 'LongTermDebt', 'ShortTermBorrowings']
+EV_FACT_TAGS = ['CashAndCashEquivalentsAtCarryingValue', *EV_DEBT_TAGS]
+
+_ticker_to_cik_lock = threading.Lock()
+# Set when the ticker list could not be loaded, so later lookups fail without asking the SEC again
+_ticker_to_cik_error = None
+
+# The earliest time the next SEC request may be sent, shared by every thread
+_sec_rate_lock = threading.Lock()
+_sec_next_request_time = 0.0
 
 # --- HELPER FUNCTIONS ---
 
-def format_large_number(num):
-    """Formats a large number into a readable string (T, B, M, K)."""
-    if pd.isna(num) or not isinstance(num, (int, float)):
-        return "N/A"
-    num = float(num)
-    if abs(num) >= 1_000_000_000_000:
-        return f"${num / 1_000_000_000_000:,.2f} T"
-    elif abs(num) >= 1_000_000_000:
-        return f"${num / 1_000_000_000:,.2f} B"
-    elif abs(num) >= 1_000_000:
-        return f"${num / 1_000_000:,.2f} M"
-    elif abs(num) >= 1_000:
-        return f"${num / 1_000:,.2f} K"
-    else:
-        return f"${num:,.2f}"
+def create_sec_session():
+    """Creates a session that keeps SEC connections alive and backs off on rate limits and server errors."""
+    session = requests.Session()
+    session.headers.update(SEC_HEADERS)
+    # 403 is not retried: the SEC also sends it for a blocked User-Agent, which backing off would only prolong
+    retry = Retry(total=5, backoff_factor=1, status_forcelist=[429, 500, 502, 503, 504], allowed_methods=["GET"])
+    # One pooled connection per concurrent worker
+    adapter = HTTPAdapter(pool_connections=SEC_MAX_WORKERS, pool_maxsize=SEC_MAX_WORKERS, max_retries=retry)
+    session.mount('https://', adapter)
+    return session
+
+SEC_SESSION = create_sec_session()
+
+def sec_get(url, **kwargs):
+    """Sends a GET through SEC_SESSION, waiting first so all threads together stay under SEC_MAX_REQUESTS_PER_SECOND."""
+    global _sec_next_request_time
+    # Each caller reserves the next free slot under the lock, then sleeps until it outside the lock
+    with _sec_rate_lock:
+        now = time.monotonic()
+        request_time = max(now, _sec_next_request_time)
+        _sec_next_request_time = request_time + 1 / SEC_MAX_REQUESTS_PER_SECOND
+    time.sleep(request_time - now)
+    return SEC_SESSION.get(url, timeout=SEC_TIMEOUT, **kwargs)
+
+def format_large_numbers(values):
+    """Formats a Series or DataFrame of large numbers into readable strings (T, B, M, K)."""
+    if isinstance(values, pd.DataFrame):
+        return values.apply(format_large_numbers)
+
+    # Only real numbers are formatted; anything else (None, NaN, text such as "CIK not found") shows as N/A
+    if not pd.api.types.is_numeric_dtype(values):
+        values = values.where(values.map(lambda x: isinstance(x, (int, float))))
+    numbers = values.to_numpy(dtype=float, na_value=np.nan)
+
+    # Every value is scaled by its own magnitude in one pass, then formatted with its suffix
+    magnitudes = np.abs(numbers)
+    conditions = [magnitudes >= 1_000_000_000_000, magnitudes >= 1_000_000_000, magnitudes >= 1_000_000, magnitudes >= 1_000]
+    scaled = numbers / np.select(conditions, [1_000_000_000_000, 1_000_000_000, 1_000_000, 1_000], 1)
+    suffixes = np.select(conditions, [" T", " B", " M", " K"], "")
+    formatted = ["N/A" if np.isnan(number) else f"${number:,.2f}{suffix}" for number, suffix in zip(scaled, suffixes)]
+    return pd.Series(formatted, index=values.index, name=values.name)
+
+def format_share_numbers(values):
+    """Formats a Series of share counts as whole numbers with commas for readability."""
+    # As with format_large_numbers, anything that is not a real number shows as N/A
+    if not pd.api.types.is_numeric_dtype(values):
+        values = values.where(values.map(lambda x: isinstance(x, (int, float))))
+    numbers = values.to_numpy(dtype=float, na_value=np.nan)
+    formatted = ["N/A" if np.isnan(number) else f"{int(number):,}" for number in numbers]
+    return pd.Series(formatted, index=values.index, name=values.name)
+
+
+@lru_cache(maxsize=None)
+def get_ticker(ticker):
+    """Gets the shared yfinance Ticker for a stock ticker, so data it has fetched is reused by every report."""
+    return yf.Ticker(ticker)
+
+# The yfinance data read by the grouped reports; each Ticker caches these after the first access
+YF_REPORT_ATTRIBUTES = ['info', 'calendar', 'earnings_dates', 'dividends', 'quarterly_financials', 'quarterly_cashflow', 'financials', 'cashflow', 'institutional_holders']
+
+@lru_cache(maxsize=None)
+def get_latest_close(ticker):
+    """Gets the latest close and its date from yfinance's 1-day history.
+
+    Raises LookupError if there is no recent history; lru_cache does not keep exceptions, so only prices are cached.
+    """
+    hist = get_ticker(ticker).history(period="1d")
+    if hist.empty:
+        raise LookupError(f"No recent price history for {ticker}")
+    return hist['Close'].iloc[-1], hist.index[-1].strftime('%Y-%m-%d')
 
-def format_share_number(num):
-    """Formats a number with commas for readability."""
-    if pd.isna(num) or not isinstance(num, (int, float)):
-        return "N/A"
-    return f"{int(num):,}"
+def prefetch_ticker_data(ticker):
+    """Loads the EV price and the yfinance data the grouped reports read, so the reports use the cached values.
 
+    yfinance Ticker objects are not thread-safe, so one task fetches all of a ticker's data in sequence.
+    Failures are ignored here and reported by whichever report reads the data.
+    """
+    stock = get_ticker(ticker)
+    try:
+        get_latest_close(ticker)
+    except Exception:
+        pass
+    for attribute in YF_REPORT_ATTRIBUTES:
+        try:
+            getattr(stock, attribute)
+        except Exception:
+            pass
 
 def get_latest_stock_price(ticker):
     """Gets the latest closing stock price for a given ticker using yfinance."""
     try:
-        stock = yf.Ticker(ticker)
-        hist = stock.history(period="1d")
-        if not hist.empty:
-            price = hist['Close'].iloc[-1]
-            price_date = hist.index[-1].strftime('%Y-%m-%d')
-            return price, price_date
-        else:
+        stock = get_ticker(ticker)
+        try:
+            return get_latest_close(ticker)
+        except LookupError:
             info = stock.info
             if 'previousClose' in info and info['previousClose'] is not None:
                 price = info['previousClose']
@@ -57,84 +161,169 @@ def get_latest_stock_price(ticker):
         print(f"An error occurred while fetching stock price for {ticker} with yfinance: {e}")
         return None, None
 
+@lru_cache(maxsize=None)
+def _load_ticker_to_cik():
+    cache_path = os.path.join(SEC_CACHE_DIR, f"tickers-{date.today().strftime('%Y%m%d')}.json")
+    try:
+        with open(cache_path, 'rb') as f:
+            return json_loads(f.read())
+    except (OSError, ValueError):
+        pass
+
+    url = "https://www.sec.gov/files/company_tickers.json"
+    response = sec_get(url)
+    response.raise_for_status()
+    ticker_to_cik = {}
+    for company_data in json_loads(response.content).values():
+        # The first listing of a ticker wins, as with the original linear scan
+        ticker_to_cik.setdefault(company_data.get('ticker'), str(company_data['cik_str']).zfill(10))
+
+    try:
+        os.makedirs(SEC_CACHE_DIR, exist_ok=True)
+        with open(cache_path, 'w') as f:
+            json.dump(ticker_to_cik, f)
+    except OSError as e:
+        print(f"WARNING: Could not cache the SEC ticker list: {e}")
+    return ticker_to_cik
+
+def get_ticker_to_cik():
+    """Gets the ticker to CIK map, downloading the SEC's company ticker JSON at most once a day."""
+    global _ticker_to_cik_error
+    # Tickers are resolved from a thread pool, so only the first caller may download the file
+    with _ticker_to_cik_lock:
+        if _ticker_to_cik_error is not None:
+            raise _ticker_to_cik_error
+        try:
+            return _load_ticker_to_cik()
+        except Exception as e:
+            _ticker_to_cik_error = e
+            raise
+
 def get_cik(ticker):
     """Gets the CIK number for a given stock ticker from the SEC's company ticker JSON."""
-    url = "https://www.sec.gov/files/company_tickers.json"
-    headers = {'User-Agent': 'My Scraper 1.0 contact@example.com'}
     try:
-        response = requests.get(url, headers=headers)
-        response.raise_for_status()
-        company_tickers = response.json()
-        for company_data in company_tickers.values():
-            if company_data.get('ticker') == ticker.upper():
-                return str(company_data['cik_str']).zfill(10)
-        return None
+        return get_ticker_to_cik().get(ticker.upper())
     except Exception as e:
         print(f"Error fetching CIK data from SEC: {e}")
         return None
 
+def fetch_sec_json(url, cache_name, select=None):
+    """Fetches an SEC JSON document, keeping a gzipped copy on disk so later runs can skip the download.
+
+    A copy fetched today is used as is. An older copy is revalidated with the ETag and Last-Modified
+    headers the SEC sent with it, and reused if the SEC answers 304 Not Modified.
+    If select is given, only the part of the document it returns is kept and cached.
+    """
+    cache_path = os.path.join(SEC_CACHE_DIR, f"{cache_name}.json.gz")
+    validators_path = os.path.join(SEC_CACHE_DIR, f"{cache_name}.validators.json")
+    today = date.today().isoformat()
+    try:
+        with open(validators_path, 'rb') as f:
+            validators = json_loads(f.read())
+        with gzip.open(cache_path, 'rb') as f:
+            cached_content = f.read()
+    except (OSError, EOFError, ValueError):
+        validators, cached_content = {}, None
+
+    if cached_content is not None and validators.get('date') == today:
+        return json_loads(cached_content)
+
+    request_headers = {}
+    if cached_content is not None:
+        if validators.get('etag'):
+            request_headers['If-None-Match'] = validators['etag']
+        if validators.get('last_modified'):
+            request_headers['If-Modified-Since'] = validators['last_modified']
+    response = sec_get(url, headers=request_headers)
+
+    if response.status_code == 304:
+        content = cached_content
+        data = json_loads(content)
+    else:
+        response.raise_for_status()
+        data = json_loads(response.content)
+        content = response.content
+        if select is not None:
+            data = select(data)
+            content = json.dumps(data).encode()
+        validators = {'etag': response.headers.get('ETag'), 'last_modified': response.headers.get('Last-Modified')}
+    validators['date'] = today
+
+    try:
+        os.makedirs(SEC_CACHE_DIR, exist_ok=True)
+        if content is not cached_content:
+            with gzip.open(cache_path, 'wb') as f:
+                f.write(content)
+        with open(validators_path, 'w') as f:
+            json.dump(validators, f)
+    except OSError as e:
+        print(f"WARNING: Could not cache {url}: {e}")
+    return data
+
 def fetch_filings_for_ticker(ticker, cik):
     """Fetches recent SEC filings for a single stock ticker."""
-    print(f"Fetching filings for {ticker.upper()} (CIK: {cik})...")
+    ticker_upper = ticker.upper()
+    print(f"Fetching filings for {ticker_upper} (CIK: {cik})...")
     api_url = f"https://data.sec.gov/submissions/CIK{cik}.json"
-    headers = {'User-Agent': 'My Scraper 1.0 contact@example.com'}
     try:
-        response = requests.get(api_url, headers=headers)
-        response.raise_for_status()
-        data = response.json()
+        data = fetch_sec_json(api_url, f"submissions-CIK{cik}")
     except Exception as e:
         print(f"Error fetching filings from SEC API for {ticker}: {e}")
-        return []
+        return pd.DataFrame()
 
     recent_filings = data.get('filings', {}).get('recent', {})
     if not recent_filings.get('accessionNumber'):
-        return []
-
-    filings = []
-    six_months_ago = datetime.now() - timedelta(days=180)
-
-    for i in range(len(recent_filings['accessionNumber'])):
-        filing_type = recent_filings['form'][i]
-        filing_date_str = recent_filings['filingDate'][i]
-        filing_date = datetime.strptime(filing_date_str, '%Y-%m-%d')
-
-        if filing_date < six_months_ago:
-            break  # Stop if filings are older than 6 months
-
-        description = recent_filings['primaryDocDescription'][i]
-        accession_num_stripped = recent_filings['accessionNumber'][i].replace('-', '')
-        primary_doc_name = recent_filings['primaryDocument'][i]
-        doc_link = f"https://www.sec.gov/Archives/edgar/data/{cik}/{accession_num_stripped}/{primary_doc_name}"
-        filings.append({
-            "Ticker": ticker.upper(), "Filing Type": filing_type, "Description": description,
-            "Filing Date": filing_date_str, "Link": doc_link
-        })
+        return pd.DataFrame()
+
+    # Filings dated on or before this day are more than 180 days old; ISO dates compare correctly as strings
+    six_months_ago = (datetime.now() - timedelta(days=180)).date().isoformat()
+
+    # The SEC returns the filings column by column, newest first, so keep everything before the first older filing
+    is_older = np.array(recent_filings['filingDate']) <= six_months_ago
+    recent_count = is_older.argmax() if is_older.any() else len(is_older)
+
+    filings = pd.DataFrame({
+        'Filing Type': recent_filings['form'][:recent_count],
+        'Description': recent_filings['primaryDocDescription'][:recent_count],
+        'Filing Date': recent_filings['filingDate'][:recent_count],
+    })
+    filings.insert(0, 'Ticker', ticker_upper)
+    accession_nums_stripped = pd.Series(recent_filings['accessionNumber'][:recent_count]).str.replace('-', '', regex=False)
+    filings['Link'] = f"https://www.sec.gov/Archives/edgar/data/{cik}/" + accession_nums_stripped + "/" + pd.Series(recent_filings['primaryDocument'][:recent_count])
     return filings
 
-def get_enterprise_value_data(ticker, cik):
-    """Fetches financial data and calculates Enterprise Value."""
+def select_enterprise_value_facts(facts):
+    """Keeps only the us-gaap facts the Enterprise Value calculation reads from a company facts document."""
+    us_gaap_facts = facts.get('facts', {}).get('us-gaap', {})
+    return {'facts': {'us-gaap': {tag: us_gaap_facts[tag] for tag in EV_FACT_TAGS if tag in us_gaap_facts}}}
+
+def fetch_company_facts(ticker, cik):
+    """Fetches the company facts the Enterprise Value calculation reads, or None if the SEC request failed."""
     api_url = f"https://data.sec.gov/api/xbrl/companyfacts/CIK{cik}.json"
-    headers = {'User-Agent': 'My Scraper 1.0 contact@example.com'}
     try:
-        response = requests.get(api_url, headers=headers)
-        response.raise_for_status()
-        facts = response.json()
+        return fetch_sec_json(api_url, f"companyfacts-CIK{cik}", select=select_enterprise_value_facts)
     except Exception as e:
         print(f"Error fetching financial facts for {ticker}: {e}")
         return None
 
+def get_enterprise_value_data(ticker, facts):
+    """Calculates Enterprise Value from a ticker's company facts and its yfinance market cap."""
+    if facts is None:
+        return None
+
     def get_latest_fact_value(fact_data):
         if not fact_data or 'units' not in fact_data or 'USD' not in fact_data['units']:
             return None, None
         valid_filings = [f for f in fact_data['units']['USD'] if f.get('fy') is not None and f.get('end') is not None]
         if not valid_filings:
             return None, None
-        latest_filing = max(valid_filings, key=lambda x: datetime.strptime(x['end'], '%Y-%m-%d'))
+        # ISO-8601 'YYYY-MM-DD' strings sort like the dates they hold, so no parsing is needed
+        latest_filing = max(valid_filings, key=itemgetter('end'))
         return latest_filing.get('val'), latest_filing.get('end')
 
     shares, price, market_cap = None, None, None
     try:
-        stock = yf.Ticker(ticker)
+        stock = get_ticker(ticker)
         shares = stock.info.get('sharesOutstanding')
     except Exception as e:
         print(f"An error occurred while fetching shares outstanding for {ticker} with yfinance: {e}")
@@ -146,25 +335,16 @@ def get_enterprise_value_data(ticker, cik):
     cash_fact = us_gaap_facts.get('CashAndCashEquivalentsAtCarryingValue')
     cash, cash_date = get_latest_fact_value(cash_fact)
 
-    debt_tags = ['LongTermDebtAndCapitalLeaseObligations', 'DebtAndCapitalLeaseObligationsCurrent', 'LongTermDebt', 'ShortTermBorrowings']
-    total_debt, debt_date, latest_debt_values = 0, None, {}
-    most_recent_debt_date = None
-    for tag in debt_tags:
-        fact = us_gaap_facts.get(tag)
-        if fact:
-            val, date_str = get_latest_fact_value(fact)
-            if date_str:
-                current_date = datetime.strptime(date_str, '%Y-%m-%d')
-                if most_recent_debt_date is None or current_date > most_recent_debt_date:
-                    most_recent_debt_date = current_date
-    if most_recent_debt_date:
-        debt_date = most_recent_debt_date.strftime('%Y-%m-%d')
-        for tag in debt_tags:
-            fact = us_gaap_facts.get(tag)
-            if fact:
-                val, date_str = get_latest_fact_value(fact)
-                if date_str == debt_date:
-                    latest_debt_values[tag] = val
+    total_debt, debt_date = 0, None
+    # Scan each debt tag once, keeping the tags that have a dated latest value
+    latest_debt_facts = {}
+    for tag in EV_DEBT_TAGS:
+        val, date_str = get_latest_fact_value(us_gaap_facts.get(tag))
+        if date_str:
+            latest_debt_facts[tag] = (val, date_str)
+    if latest_debt_facts:
+        debt_date = max(date_str for _, date_str in latest_debt_facts.values())
+        latest_debt_values = {tag: val for tag, (val, date_str) in latest_debt_facts.items() if date_str == debt_date}
         if 'LongTermDebtAndCapitalLeaseObligations' in latest_debt_values or 'DebtAndCapitalLeaseObligationsCurrent' in latest_debt_values:
             total_debt = latest_debt_values.get('LongTermDebtAndCapitalLeaseObligations', 0) + latest_debt_values.get('DebtAndCapitalLeaseObligationsCurrent', 0)
         else:
@@ -181,11 +361,39 @@ def get_enterprise_value_data(ticker, cik):
         "Enterprise Value": enterprise_value
     }
 
+def get_enterprise_value_row(ticker, cik, facts):
+    """Builds one row of the Enterprise Value Report for a ticker."""
+    if not cik:
+        return {"Ticker": ticker, "Market Cap": "CIK not found"}
+    print(f"Fetching financial data for {ticker}...")
+    financials = get_enterprise_value_data(ticker, facts)
+    row_data = {"Ticker": ticker}
+    if financials:
+        row_data.update(financials)
+    return row_data
+
+@lru_cache(maxsize=None)
+def get_calendar(ticker):
+    """Gets a ticker's yfinance calendar as a dict, whether yfinance returns a dictionary or a DataFrame."""
+    calendar = get_ticker(ticker).calendar
+    if not isinstance(calendar, pd.DataFrame):
+        return calendar if isinstance(calendar, dict) else {}
+
+    # A DataFrame calendar has a column per event; convert its dates once, to the types the dictionary holds
+    normalized = {}
+    if 'Earnings Date' in calendar.columns:
+        normalized['Earnings Date'] = [pd.Timestamp(d).date() for d in calendar['Earnings Date'].dropna()]
+    for column in ('Ex-Dividend Date', 'Dividend Date'):
+        if column in calendar.columns and not calendar[column].dropna().empty:
+            normalized[column] = pd.to_datetime(calendar[column].dropna().iloc[0]).date()
+    return normalized
+
 # --- FIXED EARNINGS DATE FUNCTION ---
+@lru_cache(maxsize=None)
 def get_earnings_dates(ticker):
     """
     Gets the next and previous earnings dates from yfinance.
-    This version handles both dictionary and DataFrame calendar objects.
+    The calendar comes from get_calendar, which handles both dictionary and DataFrame calendar objects.
     """
     print(f"[INFO] Fetching earnings dates for {ticker}...")
     next_earnings_date = "Not Available"
@@ -193,17 +401,10 @@ def get_earnings_dates(ticker):
     today = date.today()
 
     try:
-        stock = yf.Ticker(ticker)
-        calendar = stock.calendar
+        stock = get_ticker(ticker)
 
         # --- Logic for Next Earnings Date ---
-        earnings_dates_raw = []
-        # Handle dictionary response from yfinance
-        if isinstance(calendar, dict) and 'Earnings Date' in calendar:
-            earnings_dates_raw = calendar['Earnings Date']
-        # Handle DataFrame response
-        elif isinstance(calendar, pd.DataFrame) and 'Earnings Date' in calendar.columns:
-            earnings_dates_raw = calendar['Earnings Date'].dropna().tolist()
+        earnings_dates_raw = get_calendar(ticker).get('Earnings Date', [])
 
         # Find the soonest future date from the list
         if earnings_dates_raw:
@@ -228,10 +429,10 @@ def get_earnings_dates(ticker):
 def get_dividend_info(ticker):
     """
     Gets the next and last dividend dates for a given ticker.
-    This version handles both dictionary and DataFrame calendar objects.
+    The calendar comes from get_calendar, which handles both dictionary and DataFrame calendar objects.
     """
     try:
-        stock = yf.Ticker(ticker)
+        stock = get_ticker(ticker)
         dividends = stock.dividends
         today = date.today()
         today_utc = pd.Timestamp.now(tz='UTC').normalize()
@@ -240,29 +441,16 @@ def get_dividend_info(ticker):
             return {"is_dividend_stock": False}
 
         last_payment_date = dividends.index.max().strftime('%Y-%m-%d')
-        calendar = stock.calendar
+        calendar = get_calendar(ticker)
         next_ex_div_date = "Not Available"
         next_payment_date = "Not Available"
 
-        # Handle dictionary response
-        if isinstance(calendar, dict):
-            ex_div_val = calendar.get('Ex-Dividend Date')
-            pay_val = calendar.get('Dividend Date')
-            if ex_div_val and isinstance(ex_div_val, date) and ex_div_val > today:
-                next_ex_div_date = ex_div_val.strftime('%Y-%m-%d')
-            if pay_val and isinstance(pay_val, date) and pay_val > today:
-                next_payment_date = pay_val.strftime('%Y-%m-%d')
-
-        # Handle DataFrame response
-        elif isinstance(calendar, pd.DataFrame):
-            if 'Ex-Dividend Date' in calendar.columns and not calendar['Ex-Dividend Date'].dropna().empty:
-                ex_div_val = pd.to_datetime(calendar['Ex-Dividend Date'].dropna().iloc[0]).date()
-                if ex_div_val > today:
-                    next_ex_div_date = ex_div_val.strftime('%Y-%m-%d')
-            if 'Dividend Date' in calendar.columns and not calendar['Dividend Date'].dropna().empty:
-                pay_val = pd.to_datetime(calendar['Dividend Date'].dropna().iloc[0]).date()
-                if pay_val > today:
-                    next_payment_date = pay_val.strftime('%Y-%m-%d')
+        ex_div_val = calendar.get('Ex-Dividend Date')
+        pay_val = calendar.get('Dividend Date')
+        if ex_div_val and isinstance(ex_div_val, date) and ex_div_val > today:
+            next_ex_div_date = ex_div_val.strftime('%Y-%m-%d')
+        if pay_val and isinstance(pay_val, date) and pay_val > today:
+            next_payment_date = pay_val.strftime('%Y-%m-%d')
 
         return {
             "is_dividend_stock": True,
@@ -281,7 +469,7 @@ def display_institutional_holders(ticker):
     print(f"Institutional Holders for: {ticker.upper()}")
     print("="*80)
     try:
-        stock = yf.Ticker(ticker)
+        stock = get_ticker(ticker)
         holders = stock.institutional_holders
 
         if holders is None or holders.empty:
@@ -289,27 +477,26 @@ def display_institutional_holders(ticker):
             return
 
         # CHANGED: Use the entire 'holders' DataFrame instead of the head
-        holders_df = holders.copy()
+        # Value is not shown; dropping it builds the display frame without a full copy, and leaves the
+        # Ticker's cached holders untouched
+        holders_df = holders.drop(columns=['Value'], errors='ignore')
 
         # --- Robust Formatting ---
         if 'Shares' in holders_df.columns:
-            holders_df['Shares'] = holders_df['Shares'].apply(format_share_number)
+            holders_df['Shares'] = format_share_numbers(holders_df['Shares'])
 
         if '% Out' in holders_df.columns:
-            holders_df['% Out'] = holders_df['% Out'].apply(lambda x: f"{x:.2%}")
+            holders_df['% Out'] = holders_df['% Out'].map('{:.2%}'.format)
         elif 'pctHeld' in holders_df.columns:
-            holders_df['pctHeld'] = holders_df['pctHeld'].apply(lambda x: f"{x:.2%}")
+            holders_df['pctHeld'] = holders_df['pctHeld'].map('{:.2%}'.format)
             holders_df.rename(columns={'pctHeld': '% Out'}, inplace=True)
 
         if 'pctChange' in holders_df.columns:
-            holders_df['pctChange'] = holders_df['pctChange'].apply(lambda x: f"{x:+.2%}")
+            holders_df['pctChange'] = holders_df['pctChange'].map('{:+.2%}'.format)
 
         if 'Date Reported' in holders_df.columns:
             holders_df['Date Reported'] = pd.to_datetime(holders_df['Date Reported']).dt.strftime('%Y-%m-%d')
 
-        if 'Value' in holders_df.columns:
-             holders_df = holders_df.drop(columns=['Value'])
-
         print(holders_df.to_string(index=False))
 
     except Exception as e:
@@ -322,7 +509,7 @@ def display_company_summary(ticker):
     print(f"Company Summary for: {ticker.upper()}")
     print("="*80)
     try:
-        stock = yf.Ticker(ticker)
+        stock = get_ticker(ticker)
         summary = stock.info.get('longBusinessSummary')
         if summary:
             print(summary)
@@ -332,6 +519,15 @@ def display_company_summary(ticker):
         print(f"\nAn unexpected error occurred while retrieving company summary for {ticker}: {e}")
 
 
+def get_key_metrics(financials, cashflow):
+    """Selects the Total Revenue, Net Income and Free Cash Flow rows of a ticker's statements."""
+    income_metrics = pd.Index(['Total Revenue', 'Net Income']).intersection(financials.index, sort=False)
+    cashflow_metrics = pd.Index(['Free Cash Flow']).intersection(cashflow.index, sort=False)
+    key_metrics = pd.concat([financials.loc[income_metrics], cashflow.loc[cashflow_metrics]], sort=False)
+    # Periods only in the cash flow statement are appended after the income periods, so the union is re-sorted
+    # newest first; mixed object rows become numbers
+    return key_metrics.sort_index(axis=1, ascending=False).infer_objects()
+
 # --- DISPLAY FUNCTION FOR QUARTERLY DATA (Uses the fixed functions) ---
 def display_quarterly_data(ticker):
     """Displays earnings dates, dividend info, and quarterly data."""
@@ -355,7 +551,7 @@ def display_quarterly_data(ticker):
 
     # --- FINANCIALS ---
     try:
-        stock = yf.Ticker(ticker)
+        stock = get_ticker(ticker)
         q_financials = stock.quarterly_financials
         q_cashflow = stock.quarterly_cashflow
         if not isinstance(q_financials, pd.DataFrame) or q_financials.empty:
@@ -368,22 +564,14 @@ def display_quarterly_data(ticker):
         else:
             q_cashflow = pd.DataFrame()
 
-        metrics = {}
-        if 'Total Revenue' in q_financials.index:
-            metrics['Total Revenue'] = q_financials.loc['Total Revenue']
-        if 'Net Income' in q_financials.index:
-            metrics['Net Income'] = q_financials.loc['Net Income']
-        if 'Free Cash Flow' in q_cashflow.index:
-            metrics['Free Cash Flow'] = q_cashflow.loc['Free Cash Flow']
-
-        if not metrics:
+        quarterly_df = get_key_metrics(q_financials, q_cashflow)
+        if quarterly_df.empty:
             print("\nCould not extract key financial metrics.")
             return
 
-        quarterly_df = pd.DataFrame(metrics).transpose()
         quarterly_df.index.name = "Metric"
-        quarterly_df.columns = [d.strftime('%Y-%m-%d') for d in quarterly_df.columns]
-        formatted_df = quarterly_df.map(format_large_number)
+        quarterly_df.columns = quarterly_df.columns.strftime('%Y-%m-%d')
+        formatted_df = format_large_numbers(quarterly_df)
         print("\nQuarterly Financial Summary (Last 5 Quarters):")
         print(formatted_df.to_string())
 
@@ -397,7 +585,7 @@ def display_yearly_data(ticker):
     print("="*80)
 
     try:
-        stock = yf.Ticker(ticker)
+        stock = get_ticker(ticker)
         y_financials = stock.financials
         y_cashflow = stock.cashflow
 
@@ -412,22 +600,14 @@ def display_yearly_data(ticker):
         else:
             y_cashflow = pd.DataFrame()
 
-        metrics = {}
-        if 'Total Revenue' in y_financials.index:
-            metrics['Total Revenue'] = y_financials.loc['Total Revenue']
-        if 'Net Income' in y_financials.index:
-            metrics['Net Income'] = y_financials.loc['Net Income']
-        if 'Free Cash Flow' in y_cashflow.index:
-            metrics['Free Cash Flow'] = y_cashflow.loc['Free Cash Flow']
-
-        if not metrics:
+        yearly_df = get_key_metrics(y_financials, y_cashflow)
+        if yearly_df.empty:
             print("\nCould not extract key yearly financial metrics.")
             return
 
-        yearly_df = pd.DataFrame(metrics).transpose()
         yearly_df.index.name = "Metric"
-        yearly_df.columns = [str(d.year) for d in yearly_df.columns]
-        formatted_df = yearly_df.map(format_large_number)
+        yearly_df.columns = yearly_df.columns.year.astype(str)
+        formatted_df = format_large_numbers(yearly_df)
 
         print("\nYearly Financial Summary (Last 5 Years):")
         print(formatted_df.to_string())
@@ -451,19 +631,37 @@ if __name__ == "__main__":
         print("No valid tickers entered.")
     else:
         # --- Data Gathering Phase ---
+        # The lookups are network-bound, so each phase runs its tickers concurrently; map keeps ticker order
         ticker_to_cik = {}
-        all_filings = []
-        for ticker in tickers:
-            cik = get_cik(ticker)
-            if not cik:
-                print(f"Could not find CIK for ticker: {ticker.upper()}. Skipping.")
-                continue
-            ticker_to_cik[ticker] = cik
-            all_filings.extend(fetch_filings_for_ticker(ticker, cik))
+        filings_frames = []
+        with ThreadPoolExecutor(max_workers=SEC_MAX_WORKERS) as executor:
+            for ticker, cik in zip(tickers, executor.map(get_cik, tickers)):
+                if not cik:
+                    print(f"Could not find CIK for ticker: {ticker.upper()}. Skipping.")
+                    continue
+                ticker_to_cik[ticker] = cik
+
+        # The EV price and the grouped reports only need a resolved ticker, so their yfinance data is fetched
+        # in the background, one task per ticker, while the SEC filings are gathered. Leaving the block waits
+        # for both pools, so no Ticker is read by the reports while its prefetch is still running.
+        with ThreadPoolExecutor(max_workers=YF_MAX_WORKERS) as report_executor, \
+                ThreadPoolExecutor(max_workers=SEC_MAX_WORKERS) as executor:
+            for ticker in ticker_to_cik:
+                report_executor.submit(prefetch_ticker_data, ticker)
+
+            # Company facts are only needed for the EV report, but they are requested alongside the filings.
+            # Both downloads go through fetch_sec_json and so through sec_get, whose shared rate limit paces
+            # the two kinds of request together; the pool only decides how many wait at once
+            filings_results = executor.map(fetch_filings_for_ticker, ticker_to_cik.keys(), ticker_to_cik.values())
+            facts_results = executor.map(fetch_company_facts, ticker_to_cik.keys(), ticker_to_cik.values())
+            for filings in filings_results:
+                if not filings.empty:
+                    filings_frames.append(filings)
+            company_facts = dict(zip(ticker_to_cik.keys(), facts_results))
 
         # --- Filings Report ---
-        if all_filings:
-            df = pd.DataFrame(sorted(all_filings, key=lambda x: x['Filing Date'], reverse=True))
+        if filings_frames:
+            df = pd.concat(filings_frames, ignore_index=True)
             print(f"\n--- Filings Summary ---")
             for ticker in tickers:
                 if ticker in ticker_to_cik:
@@ -476,36 +674,30 @@ if __name__ == "__main__":
                         print(filing_counts.to_string())
                         print(f"Date Range of Filings: {date_range['min']} to {date_range['max']}")
             print("---------------------------------")
-            print(f"\nDisplaying the top {len(df)} most recent filings for: {', '.join(tickers)}")
-            print(df.to_string(columns=['Ticker', 'Filing Type', 'Filing Date', 'Description', 'Link'], index=False))
+            # Every filing is listed newest first; ISO dates sort correctly as strings, and the stable sort keeps
+            # same-day filings in ticker order
+            recent_df = df.sort_values('Filing Date', ascending=False, kind='stable')
+            print(f"\nDisplaying the top {len(recent_df)} most recent filings for: {', '.join(tickers)}")
+            print(recent_df.to_string(columns=['Ticker', 'Filing Type', 'Filing Date', 'Description', 'Link'], index=False))
 
         # --- Enterprise Value Report ---
         print("\n" + "="*80)
         print("Enterprise Value Report")
         print("Note: Market Cap is from yfinance. Other financial data is from recent SEC filings.")
         print("="*80)
-        ev_data = []
-        for ticker in tickers:
-            cik = ticker_to_cik.get(ticker)
-            if not cik:
-                ev_data.append({"Ticker": ticker, "Market Cap": "CIK not found"})
-                continue
-            print(f"Fetching financial data for {ticker}...")
-            financials = get_enterprise_value_data(ticker, cik)
-            row_data = {"Ticker": ticker}
-            if financials:
-                row_data.update(financials)
-            ev_data.append(row_data)
+        with ThreadPoolExecutor(max_workers=SEC_MAX_WORKERS) as executor:
+            ev_data = list(executor.map(get_enterprise_value_row, tickers, map(ticker_to_cik.get, tickers), map(company_facts.get, tickers)))
         if ev_data:
             ev_df = pd.DataFrame(ev_data)
             for col in ["Market Cap", "Total Debt", "Cash & Equivalents", "Enterprise Value"]:
                 if col in ev_df.columns:
-                    ev_df[col] = ev_df[col].apply(lambda x: format_large_number(x))
+                    ev_df[col] = format_large_numbers(ev_df[col])
             report_cols = ["Ticker", "Enterprise Value", "Market Cap", "Total Debt", "Cash & Equivalents", "Market Cap Date", "Debt Date", "Cash Date"]
             final_cols = [c for c in report_cols if c in ev_df.columns]
             print(ev_df[final_cols].to_string(index=False))
 
         # --- Grouped Reports ---
+        # The reports print one ticker at a time from the data prefetched above
         all_earnings_dates = []
 
         # Company Summaries
@@ -518,7 +710,7 @@ if __name__ == "__main__":
             if ticker in ticker_to_cik:
                 display_quarterly_data(ticker)
                 display_yearly_data(ticker)
-                # Collect earnings dates once to avoid redundant calls
+                # The quarterly report already looked these up; get_earnings_dates returns its cached result
                 earnings_dates = get_earnings_dates(ticker)
                 all_earnings_dates.append({
                     "Ticker": ticker,
@@ -0,0 +1,81 @@
+from functools import lru_cache
+
+# Minimum widths shared by every outlier table
+DEFAULT_MIN_WIDTHS = {
+    'Symbol': 10,
+    'IndustryName': 40,
+    'MCap/EV (%)': 15,
+    'Note': 4, # Minimum for 'Note'
+}
+
+@lru_cache(maxsize=None)
+def _get_formatter(col_format):
+    # Bind the format spec once per column format instead of re-parsing it for every cell
+    if not col_format:
+        return str
+    if col_format.endswith('%'):
+        # Handle percentage formatting separately
+        return f"{{:{col_format[:-1]}}}%".format
+    return f"{{:{col_format}}}".format
+
+def _format_column(values, col_format):
+    # The NaN mask is computed once per column, so the per-cell work is a single format call
+    format_value = _get_formatter(col_format)
+    return [
+        "N/A" if is_missing else format_value(value) # Or an empty string, depending on preference
+        for value, is_missing in zip(values.tolist(), values.isna().tolist())
+    ]
+
+def print_table(title, dataframe, columns_info, min_widths=None):
+    """
+    Prints a DataFrame as a fixed-width, pipe-separated table.
+
+    Args:
+        title (str): The title printed above the table.
+        dataframe (pd.DataFrame): The rows to print.
+        columns_info (list): (column name, header, format spec) tuples, in display order.
+            Format specs ending in '%' are printed with a trailing percent sign.
+        min_widths (dict, optional): Minimum widths per column name, in addition to
+            DEFAULT_MIN_WIDTHS.
+    """
+    print(f"\n\n{'='*25} {title} {'='*25}")
+    if dataframe.empty:
+        print("No outliers found in this category.")
+        return
+
+    # Calculate column widths
+    column_widths = {}
+    for col_df_name, col_header, col_format in columns_info:
+        max_len = len(col_header)
+        if col_df_name in dataframe.columns:
+            if col_format:
+                # Fixed-point formats grow with magnitude, so the widest value is the min or max
+                extremes = dataframe[col_df_name].agg(['min', 'max'])
+                max_len = max(max_len, *map(len, _format_column(extremes, col_format)))
+            else:
+                max_len = max(max_len, dataframe[col_df_name].astype(str).str.len().max())
+        column_widths[col_df_name] = max_len
+
+    # Adjust for specific columns that might have fixed width requirements or minimums
+    for col_df_name, min_width in {**DEFAULT_MIN_WIDTHS, **(min_widths or {})}.items():
+        column_widths[col_df_name] = max(column_widths.get(col_df_name, 0), min_width)
+
+    # Every line is laid out by one fixed-width template, e.g. "{:<10} | {:<40} | ..."
+    column_names = [col_df_name for col_df_name, _, _ in columns_info]
+    row_template = " | ".join(f"{{:<{column_widths[col_df_name]}}}" for col_df_name in column_names)
+
+    # Print header
+    header_line = row_template.format(*(col_header for _, col_header, _ in columns_info))
+    separator_line = "-" * len(header_line)
+    lines = [separator_line, header_line, separator_line]
+
+    # Print data rows, formatting each column as a whole and zipping the cells back into rows
+    formatted_columns = [
+        _format_column(dataframe[col_df_name], col_format)
+        for col_df_name, _, col_format in columns_info
+    ]
+    lines.extend(row_template.format(*cells) for cells in zip(*formatted_columns))
+    lines.append(separator_line)
+
+    # Emit the whole table in one write rather than one per row
+    print("\n".join(lines))